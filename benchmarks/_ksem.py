@@ -0,0 +1,16 @@
+"""Lädt Module aus custom_components/ksem, ohne das Paket-__init__ auszuführen.
+
+So laufen die Benchmarks für reine Hilfsmodule auch ohne Home Assistant.
+"""
+
+import pathlib
+import sys
+import types
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+PACKAGE_DIR = ROOT / "custom_components" / "ksem"
+
+if "ksem" not in sys.modules:
+    _pkg = types.ModuleType("ksem")
+    _pkg.__path__ = [str(PACKAGE_DIR)]
+    sys.modules["ksem"] = _pkg
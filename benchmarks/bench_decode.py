@@ -0,0 +1,128 @@
+"""Micro-Benchmark: Block-Decoder des Leseplans vs. bisheriger Feld-für-Feld-Weg.
+
+Aufruf: python benchmarks/bench_decode.py [--rounds N]
+"""
+
+import argparse
+import random
+import timeit
+
+import _ksem  # noqa: F401
+from ksem.modbus_map import SENSOR_DEFINITIONS
+from ksem.modbus_plan import REGISTER_SIZES, compile_read_plan
+
+
+def _legacy_blocks(sensor_defs, max_gap=2):
+    """Gruppierung wie im alten group_register_blocks (bei jedem Poll)"""
+    blocks = []
+    block = []
+    last_end = None
+    for addr in sorted(sensor_defs.keys()):
+        reg_size = REGISTER_SIZES[sensor_defs[addr]["type"]]
+        if last_end is None or addr <= last_end + max_gap:
+            block.append((addr, reg_size))
+        else:
+            blocks.append(block)
+            block = [(addr, reg_size)]
+        last_end = addr + reg_size - 1
+    if block:
+        blocks.append(block)
+    return blocks
+
+
+def legacy_decode(responses, client=None):
+    """Nachbau des alten read_all-Decodings inkl. Closure und DATATYPE-Probe"""
+
+    def _decode_fallback(raw_regs, dtype, word_order="big"):
+        words = list(raw_regs)
+        if word_order.lower() != "big":
+            words = list(reversed(words))
+        dtype = dtype.upper()
+        n = len(words)
+        if dtype in ("UINT16", "U16") and n >= 1:
+            return words[0] & 0xFFFF
+        if dtype in ("INT16", "S16") and n >= 1:
+            v = words[0] & 0xFFFF
+            return v - 0x10000 if v & 0x8000 else v
+        if dtype in ("UINT32", "U32") and n >= 2:
+            return ((words[0] & 0xFFFF) << 16) | (words[1] & 0xFFFF)
+        if dtype in ("INT32", "S32") and n >= 2:
+            u = ((words[0] & 0xFFFF) << 16) | (words[1] & 0xFFFF)
+            return u - 0x1_0000_0000 if u & 0x8000_0000 else u
+        if dtype in ("UINT64", "U64") and n >= 4:
+            return (
+                ((words[0] & 0xFFFF) << 48)
+                | ((words[1] & 0xFFFF) << 32)
+                | ((words[2] & 0xFFFF) << 16)
+                | (words[3] & 0xFFFF)
+            )
+        raise ValueError(dtype)
+
+    data = {}
+    for block, registers in zip(_legacy_blocks(SENSOR_DEFINITIONS), responses):
+        offset = 0
+        for addr, size in block:
+            spec = SENSOR_DEFINITIONS[addr]
+            raw_regs = registers[offset : offset + size]
+            datatype_name = spec["type"].upper()
+            datatypes = getattr(client, "DATATYPE", None)
+            datatype_enum = getattr(datatypes, datatype_name, None)
+            if datatype_enum is not None and hasattr(client, "convert_from_registers"):
+                val = client.convert_from_registers(raw_regs, data_type=datatype_enum)
+            else:
+                val = _decode_fallback(raw_regs, datatype_name, word_order="big")
+            data[spec["name"]] = val * spec.get("scale", 1)
+            offset += size
+    return data
+
+
+def plan_decode(plan, responses):
+    data = {}
+    for block, registers in zip(plan.blocks, responses):
+        data.update(block.decode(registers))
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    plan = compile_read_plan(SENSOR_DEFINITIONS)
+
+    def _regs(count):
+        return [rng.randrange(0, 0x10000) for _ in range(count)]
+
+    legacy_responses = [
+        _regs(sum(size for _, size in b) + 4)
+        for b in _legacy_blocks(SENSOR_DEFINITIONS)
+    ]
+    plan_responses = [_regs(block.count) for block in plan.blocks]
+
+    candidates = {
+        "legacy (fallback closure)": lambda: legacy_decode(legacy_responses),
+        "plan (struct per block)": lambda: plan_decode(plan, plan_responses),
+    }
+    try:
+        from pymodbus.client import AsyncModbusTcpClient
+
+        legacy_decode(legacy_responses, AsyncModbusTcpClient)
+    except Exception:  # pymodbus fehlt oder convert_from_registers inkompatibel
+        pass
+    else:
+        candidates["legacy (convert_from_registers)"] = lambda: legacy_decode(
+            legacy_responses, AsyncModbusTcpClient
+        )
+
+    print(
+        f"{len(SENSOR_DEFINITIONS)} Felder, {plan.request_count} Blöcke, "
+        f"{args.rounds} Runden"
+    )
+    for label, func in candidates.items():
+        best = min(timeit.repeat(func, number=args.rounds, repeat=5)) / args.rounds
+        print(f"{label:34s} {best * 1e6:8.1f} µs/Poll")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""Micro-Benchmark: Modbus-Entitäten aus SensorDescription vs. bisherigem Weg.
+
+Erzeugt einige hundert KsemObisModbusSensor (die Registertabelle mehrfach)
+und misst Anlegen sowie die Eigenschaften, die bei jedem Zustandsschreiben
+gelesen werden. Der bisherige Weg (Ableitung aus dem Roh-Dict im Konstruktor,
+int() und Map-Lookup in native_value) ist hier nachgebaut. Braucht Home
+Assistant im Python-Pfad:
+
+    python benchmarks/bench_entities.py --copies 4 --rounds 200
+"""
+
+import argparse
+import random
+import timeit
+
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorStateClass,
+)
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+import _ksem  # noqa: F401
+from ksem.modbus_map import SENSOR_DEFINITIONS
+from ksem.modbus_plan import SENSOR_DESCRIPTIONS
+from ksem.sensor import KsemObisModbusSensor
+
+DEVICE_INFO = {"identifiers": {("ksem", "bench")}}
+
+
+class LegacyObisModbusSensor(CoordinatorEntity, SensorEntity):
+    """Stand vor den SensorDescriptions"""
+
+    def __init__(self, coordinator, modbus_client, address, spec, device_info):
+        super().__init__(coordinator, context=spec["name"])
+        self._modbus_client = modbus_client
+        self._address = address
+        self._key = spec["name"]
+        self._mapping = spec.get("map")
+        self._attr_name = f"{spec['name']}"
+        self._attr_native_unit_of_measurement = spec["unit"]
+        if spec.get("device_class") == "enum":
+            self._attr_device_class = SensorDeviceClass.ENUM
+            self._attr_options = list(self._mapping.values()) if self._mapping else []
+            self._attr_native_unit_of_measurement = None
+            self._attr_state_class = None
+        else:
+            self._attr_device_class = spec.get("device_class")
+            if spec.get("device_class") == "energy" or spec.get("unit") in (
+                "Wh",
+                "kWh",
+                "VAh",
+                "varh",
+            ):
+                self._attr_state_class = SensorStateClass.TOTAL_INCREASING
+            elif spec.get("device_class") in (
+                "power",
+                "voltage",
+                "current",
+                "battery",
+                "temperature",
+                "frequency",
+            ):
+                self._attr_state_class = SensorStateClass.MEASUREMENT
+            else:
+                self._attr_state_class = None
+        ident = next(iter(device_info["identifiers"]))[1]
+        self._attr_unique_id = f"{ident}_obis_{address}"
+        self._attr_device_info = device_info
+
+    @property
+    def native_value(self):
+        val = self.coordinator.data.get(self._key)
+        if self._mapping:
+            return self._mapping.get(int(val), f"Unbekannt ({val})")
+        return val
+
+
+class StandInCoordinator:
+    """Nur was CoordinatorEntity im Konstruktor und native_value braucht"""
+
+    def __init__(self, data):
+        self.data = data
+
+
+def _snapshot(rng):
+    data = {}
+    for spec in SENSOR_DEFINITIONS.values():
+        if spec.get("map"):
+            data[spec["name"]] = rng.choice(list(spec["map"]))
+        else:
+            data[spec["name"]] = rng.uniform(0, 5000)
+    return data
+
+
+def _read_state(entities):
+    # Was beim Zustandsschreiben pro Entität abgefragt wird
+    for entity in entities:
+        entity.native_value
+        entity.device_class
+        entity.state_class
+        entity.native_unit_of_measurement
+        entity.options
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--copies", type=int, default=4)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    coordinator = StandInCoordinator(_snapshot(random.Random(42)))
+    legacy_items = list(SENSOR_DEFINITIONS.items()) * args.copies
+    descriptions = list(SENSOR_DESCRIPTIONS) * args.copies
+
+    def create_legacy():
+        return [
+            LegacyObisModbusSensor(coordinator, None, addr, spec, DEVICE_INFO)
+            for addr, spec in legacy_items
+        ]
+
+    def create_described():
+        return [
+            KsemObisModbusSensor(coordinator, None, description, DEVICE_INFO)
+            for description in descriptions
+        ]
+
+    legacy = create_legacy()
+    described = create_described()
+    assert [e.native_value for e in legacy] == [e.native_value for e in described]
+
+    print(f"{len(descriptions)} Entitäten, {args.rounds} Runden")
+    for label, create, entities in (
+        ("bisher (Roh-Dict)", create_legacy, legacy),
+        ("SensorDescription", create_described, described),
+    ):
+        created = min(timeit.repeat(create, number=args.rounds, repeat=5))
+        read = min(
+            timeit.repeat(lambda: _read_state(entities), number=args.rounds, repeat=5)
+        )
+        per_entity = len(entities) * args.rounds
+        print(
+            f"{label:20s} anlegen {created / per_entity * 1e6:6.2f} µs   "
+            f"Zustand lesen {read / per_entity * 1e6:6.2f} µs   je Entität"
+        )
+
+
+if __name__ == "__main__":
+    main()
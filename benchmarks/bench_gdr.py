@@ -0,0 +1,132 @@
+"""GDR-Decoder offline: aufgezeichnete oder synthetische Frames dekodieren.
+
+Ohne Argument werden Frames im erwarteten Aufbau (siehe gdr.py) erzeugt, mit
+--frames wird eine Datei mit einem base64-kodierten Binär-Frame pro Zeile
+gelesen, z. B. aus den Entwicklertools des Browsers kopiert. Jeder Frame wird
+einmal dekodiert ausgegeben (--show) und anschließend die Dekodierzeit
+gemessen.
+
+    python benchmarks/bench_gdr.py --evses 2 --rounds 5000
+    python benchmarks/bench_gdr.py --frames gdr_frames.txt --show
+"""
+
+import argparse
+import base64
+import struct
+import timeit
+
+import _ksem  # noqa: F401
+from ksem.gdr import (
+    GDR_ID,
+    GDR_SENSORS,
+    GDR_STATUS,
+    GDR_TIMESTAMP,
+    GDR_VALUES,
+    GDRS_ENTRIES,
+    MAP_KEY,
+    MAP_VALUE,
+    TIMESTAMP_SECONDS,
+    WIRE_I64,
+    WIRE_LEN,
+    WIRE_VARINT,
+    GdrDecodeError,
+    decode_gdrs,
+)
+
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _field(number: int, wire: int, payload) -> bytes:
+    tag = _varint(number << 3 | wire)
+    if wire == WIRE_VARINT:
+        return tag + _varint(payload)
+    if wire == WIRE_LEN:
+        return tag + _varint(len(payload)) + payload
+    return tag + payload
+
+
+def synthetic_frame(uuids, timestamp=1_700_000_000) -> bytes:
+    """GDRs-Frame mit allen GDR_SENSORS-Werten pro Wallbox"""
+    frame = b""
+    for index, uuid in enumerate(uuids):
+        gdr = (
+            _field(GDR_ID, WIRE_LEN, uuid.encode())
+            + _field(GDR_STATUS, WIRE_VARINT, 2)
+            + _field(
+                GDR_TIMESTAMP,
+                WIRE_LEN,
+                _field(TIMESTAMP_SECONDS, WIRE_VARINT, timestamp),
+            )
+        )
+        for number, obis in enumerate(GDR_SENSORS, start=1):
+            entry = _field(MAP_KEY, WIRE_LEN, obis.encode()) + _field(
+                MAP_VALUE, WIRE_I64, struct.pack("<d", number * 10.5 + index)
+            )
+            gdr += _field(GDR_VALUES, WIRE_LEN, entry)
+        frame += _field(
+            GDRS_ENTRIES,
+            WIRE_LEN,
+            _field(MAP_KEY, WIRE_LEN, uuid.encode()) + _field(MAP_VALUE, WIRE_LEN, gdr),
+        )
+    return frame
+
+
+def _load_frames(path):
+    with open(path, encoding="utf-8") as file:
+        return [base64.b64decode(line.strip()) for line in file if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--frames", help="Datei mit base64-Frames, einer pro Zeile")
+    parser.add_argument("--evses", type=int, default=1)
+    parser.add_argument("--rounds", type=int, default=5000)
+    parser.add_argument("--show", action="store_true", help="Frames ausgeben")
+    args = parser.parse_args()
+
+    if args.frames:
+        frames = _load_frames(args.frames)
+    else:
+        uuids = [f"00000000-0000-0000-0000-{i:012d}" for i in range(args.evses)]
+        frames = [synthetic_frame(uuids)]
+
+    valid = []
+    for number, frame in enumerate(frames, start=1):
+        try:
+            decoded = decode_gdrs(frame)
+        except GdrDecodeError as err:
+            print(f"Frame {number}: nicht lesbar ({err})")
+            continue
+        valid.append(frame)
+        if args.show:
+            print(f"Frame {number} ({len(frame)} Bytes): {decoded}")
+    if not valid:
+        return
+
+    size = sum(len(frame) for frame in valid) / len(valid)
+    best = min(
+        timeit.repeat(
+            lambda: [decode_gdrs(frame) for frame in valid],
+            number=args.rounds,
+            repeat=5,
+        )
+    )
+    per_frame = best / args.rounds / len(valid)
+    print(
+        f"{len(valid)} Frames, Ø {size:.0f} Bytes: {per_frame * 1e6:6.1f} µs/Frame "
+        f"({1 / per_frame:,.0f} Frames/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""HTTP-Benchmark: wiederverwendete Verbindungen vs. neue Verbindung pro Request.
+
+Startet lokal einen aiohttp-Server, der wie der KSEM-Webserver antwortet
+(/api/e-mobility/state), und fragt ihn einmal über die Session aus
+http_session.create_session (Keep-Alive-Pool) und einmal mit einer frischen
+Verbindung pro Request ab. Läuft komplett offline. Beispiel:
+
+    python benchmarks/bench_http.py --requests 200 --latency 5
+    python benchmarks/bench_http.py --concurrency 3 --handshake 20
+
+--handshake simuliert die Kosten eines Verbindungsaufbaus auf dem Gerät
+(TCP-Accept auf dem langsamen KSEM), die bei Keep-Alive nur einmal anfallen.
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import aiohttp
+from aiohttp import web
+
+import _ksem  # noqa: F401
+from ksem.http_session import create_session
+
+STATE = {
+    "CurtailmentSetpoint": {"l1": 16000, "l2": 16000, "l3": 16000, "total": 48000},
+    "EvChargingPower": {"l1": 0, "l2": 0, "l3": 0, "total": 0},
+    "OverloadProtectionActive": False,
+    "GridPowerLimit": {"Active": False, "Power": 0},
+    "PVPowerLimit": {"Active": False, "Power": 0},
+}
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))]
+
+
+class StandInServer:
+    """aiohttp-Server mit Antwortlatenz und Kosten pro neuer Verbindung"""
+
+    def __init__(self, latency: float, handshake: float):
+        self.latency = latency
+        self.handshake = handshake
+        self.connections = 0
+        self._seen = set()
+        self._body = json.dumps(STATE)
+        self._runner = None
+        self.port = None
+
+    async def _state(self, request):
+        # Neue Verbindung: Client-Port noch nicht gesehen
+        peer = request.transport.get_extra_info("peername")
+        if peer not in self._seen:
+            self._seen.add(peer)
+            self.connections += 1
+            await asyncio.sleep(self.handshake)
+        await asyncio.sleep(self.latency)
+        return web.Response(text=self._body, content_type="application/json")
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/api/e-mobility/state", self._state)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        await self._runner.cleanup()
+
+
+async def _timed_get(session, url, latencies):
+    start = time.perf_counter()
+    async with session.get(url) as resp:
+        await resp.read()
+    latencies.append(time.perf_counter() - start)
+
+
+async def run_pooled(url, requests, concurrency):
+    latencies = []
+    session = create_session(pool_size=concurrency)
+    try:
+        await _run(lambda: _timed_get(session, url, latencies), requests, concurrency)
+    finally:
+        await session.close()
+    return latencies
+
+
+async def run_fresh(url, requests, concurrency):
+    latencies = []
+
+    async def one():
+        # Ohne Keep-Alive: jede Anfrage baut ihre eigene Verbindung auf
+        connector = aiohttp.TCPConnector(force_close=True)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            await _timed_get(session, url, latencies)
+
+    await _run(one, requests, concurrency)
+    return latencies
+
+
+async def _run(request, requests, concurrency):
+    limit = asyncio.Semaphore(concurrency)
+
+    async def limited():
+        async with limit:
+            await request()
+
+    await asyncio.gather(*(limited() for _ in range(requests)))
+
+
+def _report(name, latencies, wall, connections):
+    ms = [v * 1000 for v in latencies]
+    print(
+        f"{name:<8} p50 {_percentile(ms, 50):7.2f}  p95 {_percentile(ms, 95):7.2f}  "
+        f"mean {statistics.mean(ms):7.2f}  max {max(ms):7.2f} ms   "
+        f"gesamt {wall:6.2f} s   Verbindungen {connections}"
+    )
+
+
+async def main(args):
+    server = StandInServer(args.latency / 1000, args.handshake / 1000)
+    await server.start()
+    url = f"http://127.0.0.1:{server.port}/api/e-mobility/state"
+    print(
+        f"{args.requests} Requests, Parallelität {args.concurrency}, Latenz "
+        f"{args.latency} ms, Verbindungsaufbau {args.handshake} ms"
+    )
+    try:
+        for name, runner in (("Pool", run_pooled), ("Frisch", run_fresh)):
+            server.connections = 0
+            start = time.perf_counter()
+            latencies = await runner(url, args.requests, args.concurrency)
+            _report(name, latencies, time.perf_counter() - start, server.connections)
+    finally:
+        await server.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--latency", type=float, default=5, help="ms pro Antwort")
+    parser.add_argument(
+        "--handshake", type=float, default=10, help="ms pro neuer Verbindung"
+    )
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,232 @@
+"""Spielt einen KSEM-Mitschnitt (Option capture_traffic) als Server wieder ab.
+
+Der aiohttp-Server beantwortet den Login mit einem festen Token, GET-Requests
+mit der zuletzt (bezogen auf die Abspielzeit) aufgezeichneten Antwort des
+Pfads und schreibende Requests mit 204. Jede WebSocket-Verbindung bekommt die
+Frames ihres Themas im aufgezeichneten Takt, geteilt durch --speed. Die
+Integration lässt sich so gegen 127.0.0.1:<port> einrichten:
+
+    python benchmarks/ksem_replay.py ksem_capture_<id>.jsonl.gz --port 8080
+
+Mit --measure verbindet sich das Skript selbst mit allen Themen, dekodiert
+die Frames wie die Integration (JSON bzw. gdr.decode_gdrs) und meldet
+Latenz vom Senden bis zur dekodierten Nachricht sowie CPU-Zeit pro Frame:
+
+    python benchmarks/ksem_replay.py capture.jsonl.gz --speed 50 --measure
+"""
+
+import argparse
+import asyncio
+import base64
+import bisect
+import gzip
+import json
+import statistics
+import time
+from collections import defaultdict
+
+import aiohttp
+from aiohttp import web
+
+import _ksem  # noqa: F401
+from ksem.gdr import decode_gdrs
+
+WS_PREFIX = "/api/data-transfer/ws/"
+LOGIN_PATH = "/api/web-login/token"
+TOKEN = {"access_token": "replay", "token_type": "Bearer", "expires_in": 3600}
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))]
+
+
+def load_capture(path):
+    """Ereignisse eines Mitschnitts, nach Zeit sortiert"""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as file:
+        events = [json.loads(line) for line in file if line.strip()]
+    events.sort(key=lambda event: event["t"])
+    return events
+
+
+def _body(event):
+    if "b64" in event:
+        return base64.b64decode(event["b64"])
+    return event.get("text", "")
+
+
+class ReplayServer:
+    """aiohttp-Server, der einen Mitschnitt mit speed-facher Geschwindigkeit
+    wiedergibt"""
+
+    def __init__(self, events, speed: float = 1.0, loop_frames: bool = False):
+        self.speed = speed
+        self.loop_frames = loop_frames
+        # GET-Pfad -> (Zeitpunkte, Ereignisse); WebSocket-Pfad -> Frames
+        self._rest = defaultdict(lambda: ([], []))
+        self.frames = defaultdict(list)
+        for event in events:
+            if event["kind"] == "rest" and event["method"] == "GET":
+                times, entries = self._rest[event["path"]]
+                times.append(event["t"])
+                entries.append(event)
+            elif event["kind"] == "ws":
+                self.frames[event["path"]].append(event)
+        # Sendezeitpunkte pro Thema, für --measure
+        self.sent = defaultdict(list)
+        self.stats = {"rest": 0, "rest_missing": 0, "ws_connects": 0, "frames": 0}
+        self._started = None
+        self._runner = None
+        self.port = None
+
+    def _elapsed(self) -> float:
+        return (time.monotonic() - self._started) * self.speed
+
+    async def _login(self, request):
+        return web.json_response(TOKEN)
+
+    async def _rest_handler(self, request):
+        if request.method != "GET":
+            return web.Response(status=204)
+        entry = self._rest.get(request.path)
+        if entry is None:
+            self.stats["rest_missing"] += 1
+            return web.Response(status=404)
+        times, entries = entry
+        # Letzte Antwort bis zur aktuellen Abspielzeit, sonst die erste
+        index = max(bisect.bisect_right(times, self._elapsed()) - 1, 0)
+        event = entries[index]
+        self.stats["rest"] += 1
+        body = _body(event)
+        return web.Response(
+            status=event["status"],
+            body=body if isinstance(body, bytes) else body.encode(),
+            content_type="application/json",
+        )
+
+    async def _ws_handler(self, request):
+        path = request.path[len(WS_PREFIX) :]
+        frames = self.frames.get(path)
+        if frames is None:
+            return web.Response(status=404)
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.stats["ws_connects"] += 1
+        # Erste Nachricht ist das Token ("Bearer <token>")
+        await ws.receive()
+        offset = frames[0]["t"]
+        while not ws.closed:
+            start = time.monotonic()
+            for event in frames:
+                delay = (event["t"] - offset) / self.speed - (time.monotonic() - start)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                if ws.closed:
+                    break
+                body = _body(event)
+                self.sent[path].append(time.perf_counter())
+                if isinstance(body, bytes):
+                    await ws.send_bytes(body)
+                else:
+                    await ws.send_str(body)
+                self.stats["frames"] += 1
+            if not self.loop_frames:
+                break
+        await ws.close()
+        return ws
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0):
+        app = web.Application()
+        app.router.add_post(LOGIN_PATH, self._login)
+        app.router.add_get(WS_PREFIX + "{path:.+}", self._ws_handler)
+        app.router.add_route("*", "/{path:.*}", self._rest_handler)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        self._started = time.monotonic()
+
+    async def stop(self):
+        await self._runner.cleanup()
+
+
+async def _measure_topic(session, url, path, server, latencies, counts):
+    decode = decode_gdrs if path.startswith("protobuf/") else json.loads
+    received = 0
+    async with session.ws_connect(url) as ws:
+        await ws.send_str(f"Bearer {TOKEN['access_token']}")
+        async for msg in ws:
+            if msg.type not in (aiohttp.WSMsgType.TEXT, aiohttp.WSMsgType.BINARY):
+                continue
+            try:
+                decode(msg.data)
+            except ValueError:
+                counts["decode_errors"] += 1
+            latencies.append(time.perf_counter() - server.sent[path][received])
+            received += 1
+    counts["frames"] += received
+
+
+async def measure(server):
+    latencies = []
+    counts = {"frames": 0, "decode_errors": 0}
+    base = f"ws://127.0.0.1:{server.port}{WS_PREFIX}"
+    cpu = time.process_time()
+    wall = time.perf_counter()
+    async with aiohttp.ClientSession() as session:
+        await asyncio.gather(
+            *(
+                _measure_topic(session, base + path, path, server, latencies, counts)
+                for path in server.frames
+            )
+        )
+    cpu = time.process_time() - cpu
+    wall = time.perf_counter() - wall
+    if not latencies:
+        print("Keine WebSocket-Frames im Mitschnitt")
+        return
+    ms = [value * 1000 for value in latencies]
+    print(
+        f"{counts['frames']} Frames in {wall:.2f} s ({counts['decode_errors']} nicht "
+        f"lesbar)\nLatenz p50 {_percentile(ms, 50):.3f}  p95 "
+        f"{_percentile(ms, 95):.3f}  mean {statistics.mean(ms):.3f}  max "
+        f"{max(ms):.3f} ms\nCPU {cpu / counts['frames'] * 1e6:.1f} µs/Frame "
+        "(Server und Client in einem Prozess)"
+    )
+
+
+async def main(args):
+    events = load_capture(args.capture)
+    server = ReplayServer(events, speed=args.speed, loop_frames=args.loop)
+    await server.start(args.host, args.port)
+    topics = ", ".join(f"{path} ({len(f)})" for path, f in server.frames.items())
+    print(
+        f"{len(events)} Ereignisse, Geschwindigkeit {args.speed}x, Port "
+        f"{server.port}\nWebSocket: {topics or '-'}"
+    )
+    try:
+        if args.measure:
+            await measure(server)
+        else:
+            await asyncio.Event().wait()
+    finally:
+        print(server.stats)
+        await server.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("capture", help="ksem_capture_*.jsonl.gz")
+    parser.add_argument("--speed", type=float, default=1.0)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--loop", action="store_true", help="Frames wiederholen")
+    parser.add_argument(
+        "--measure", action="store_true", help="Latenz und CPU pro Frame messen"
+    )
+    try:
+        asyncio.run(main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,147 @@
+"""Simulierter KSEM: minimaler Modbus-TCP-Server (Function Code 3).
+
+Die Register werden aus modbus_map.SENSOR_DEFINITIONS befüllt. Latenz, Jitter
+und Fehlerrate lassen sich einstellen, Requests und Bytes werden mitgezählt.
+Anfragen werden parallel beantwortet, so wie es Pipelining erwartet.
+"""
+
+import asyncio
+import random
+import struct
+import threading
+
+import _ksem  # noqa: F401
+from ksem.modbus_map import SENSOR_DEFINITIONS
+from ksem.modbus_plan import STRUCT_CODES
+
+_MBAP = struct.Struct(">HHHB")
+
+
+def build_registers(sensor_defs=SENSOR_DEFINITIONS, seed: int = 1) -> dict:
+    """Plausible Rohwerte für alle Einträge der Registertabelle"""
+    rng = random.Random(seed)
+    registers = {}
+    for addr, spec in sensor_defs.items():
+        dtype = spec["type"].lower()
+        if dtype == "string":
+            raw = b"KSEM".ljust(spec["length"] * 2, b"\x00")
+        else:
+            code = STRUCT_CODES[dtype]
+            if code == "f":
+                value = rng.uniform(-1000, 1000)
+            elif spec.get("map"):
+                value = rng.choice(list(spec["map"]))
+            elif code.islower():
+                value = rng.randrange(-20000, 20000)
+            else:
+                value = rng.randrange(0, 60000 if code == "H" else 200000)
+            raw = struct.pack(f">{code}", value)
+        for i, (word,) in enumerate(struct.iter_unpack(">H", raw)):
+            registers[addr + i] = word
+    return registers
+
+
+class SimulatedKsem:
+    """Modbus-TCP-Server mit einstellbarer Latenz, Jitter und Fehlerrate"""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        registers: dict | None = None,
+        seed: int = 1,
+    ):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.registers = registers if registers is not None else build_registers()
+        self._rng = random.Random(seed)
+        self._server = None
+        self._handlers = set()
+        self.requests = 0
+        self.errors = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def reset_counters(self):
+        self.requests = self.errors = self.bytes_in = self.bytes_out = 0
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            for task in list(self._handlers):
+                task.cancel()
+            await asyncio.gather(*self._handlers, return_exceptions=True)
+            await self._server.wait_closed()
+            self._server = None
+
+    def _delay(self) -> float:
+        return max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter))
+
+    async def _answer(self, writer, tid, unit, pdu):
+        await asyncio.sleep(self._delay())
+        function, address, count = struct.unpack(">BHH", pdu[:5])
+        if function != 3 or not 1 <= count <= 125:
+            body = bytes((function | 0x80, 1))
+        elif self._rng.random() < self.error_rate:
+            self.errors += 1
+            body = bytes((function | 0x80, 4))  # Server Device Failure
+        else:
+            words = [self.registers.get(address + i, 0) for i in range(count)]
+            body = bytes((3, count * 2)) + struct.pack(f">{count}H", *words)
+        frame = _MBAP.pack(tid, 0, len(body) + 1, unit) + body
+        self.bytes_out += len(frame)
+        if not writer.is_closing():
+            writer.write(frame)
+
+    async def _handle(self, reader, writer):
+        handler = asyncio.current_task()
+        self._handlers.add(handler)
+        pending = set()
+        try:
+            while True:
+                header = await reader.readexactly(_MBAP.size)
+                tid, _, length, unit = _MBAP.unpack(header)
+                pdu = await reader.readexactly(length - 1)
+                self.requests += 1
+                self.bytes_in += len(header) + len(pdu)
+                task = asyncio.create_task(self._answer(writer, tid, unit, pdu))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            for task in pending:
+                task.cancel()
+            writer.close()
+            self._handlers.discard(handler)
+
+
+class SimulatorThread:
+    """Startet den Simulator in einem eigenen Thread mit eigenem Event-Loop,
+    damit CPU-Messungen im Benchmark nur den Client erfassen."""
+
+    def __init__(self, **kwargs):
+        self.sim = SimulatedKsem(**kwargs)
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+
+    def __enter__(self) -> SimulatedKsem:
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self.sim.start(), self._loop).result()
+        return self.sim
+
+    def __exit__(self, *exc):
+        asyncio.run_coroutine_threadsafe(self.sim.stop(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
@@ -1,17 +1,39 @@
+import asyncio
 import logging
 import datetime
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.device_registry import CONNECTION_NETWORK_MAC
 from datetime import timedelta
-from .const import DOMAIN
+from .const import (
+    CONF_CAPTURE_TRAFFIC,
+    CONF_MODBUS_PIPELINING,
+    CONF_WALLBOX_CONFIG_INTERVAL,
+    CONF_WALLBOX_STATE_INTERVAL,
+    CONF_WEBSOCKET_WRITE_WINDOW,
+    DEFAULT_WALLBOX_CONFIG_INTERVAL,
+    DEFAULT_WALLBOX_STATE_INTERVAL,
+    DEFAULT_WEBSOCKET_WRITE_WINDOW,
+    DOMAIN,
+)
 from .api import KsemClient
+from .capture import TrafficRecorder
+from .chargemode import ChargeModeWriter
+from .coalesce import StateWriteCoalescer
+from .coordinator import (
+    KsemEvseStateCoordinator,
+    KsemGdrCoordinator,
+    KsemModbusCoordinator,
+    KsemRestCoordinator,
+)
+from .health import CircuitOpen, HostHealth
 from .modbus_helper import KsemModbusClient
+from .websocket import KsemWebsocketManager
 
 _LOGGER = logging.getLogger(__name__)
-PLATFORMS = ["sensor", "number", "select", "switch"]
+PLATFORMS = ["sensor", "binary_sensor", "number", "select", "switch"]
 
 
 async def async_setup(hass: HomeAssistant, config: dict) -> bool:
@@ -24,8 +46,25 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
     host = entry.data["host"]
     password = entry.data["password"]
-    client = KsemClient(hass, host, password)
-    modbus_client = KsemModbusClient(host)
+    # Ein Circuit Breaker für REST, Modbus und WebSocket desselben Geräts
+    health = HostHealth(host)
+    entry.async_on_unload(health.shutdown)
+    recorder = None
+    if entry.options.get(CONF_CAPTURE_TRAFFIC, False):
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        recorder = TrafficRecorder(
+            hass.config.path(f"ksem_capture_{entry.entry_id}_{stamp}.jsonl.gz")
+        )
+        _LOGGER.info("Schneide KSEM-Verkehr mit nach %s", recorder.path)
+        entry.async_on_unload(recorder.async_close)
+    client = KsemClient(hass, host, password, health=health, recorder=recorder)
+    # Schließt die eigene HTTP-Session auch, wenn das Setup fehlschlägt
+    entry.async_on_unload(client.async_close)
+    modbus_client = KsemModbusClient(
+        host,
+        pipelining=entry.options.get(CONF_MODBUS_PIPELINING, False),
+        health=health,
+    )
 
     async def _update_smartmeter():
         try:
@@ -33,55 +72,55 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         except Exception as err:
             raise UpdateFailed(f"Smartmeter-Fehler: {err}")
 
-    async def _update_wallbox():
+    async def _optional(request, default, message):
+        """Teilabfrage, deren Fehler nur das eigene Feld betrifft"""
         try:
-            evse_list = await client.get_evse_list()
-            result = []
-
-            for evse in evse_list:
-                uuid = evse["uuid"]
-                details = await client.get_evse_details(uuid)
-                evse.update(details)
-                result.append(evse)
-
-            try:
-                res = await client.get_phase_switching()
-                phase_usage = res.get("phase_usage", 0)
-            except Exception as err:
-                _LOGGER.warning(
-                    "Phasenumschaltung konnte nicht geladen werden: %s", err
-                )
-                phase_usage = 0
-            try:
-                config = await client.get_energyflow_config()
-            except Exception as err:
-                _LOGGER.warning(
-                    "Energiefluss-Konfiguration konnte nicht geladen werdSen: %s",
-                    err,
-                )
-                config = {}
-            try:
-                evse_state = await client.get_evse_state()
-            except Exception as err:
-                _LOGGER.warning("EVSE-Status konnte nicht geladen werden: %s", err)
-                evse_state = {}
-            return {
-                "evse": result,
-                "phase_usage_state": phase_usage,
-                "energyflow_config": config,
-                "evse_state": evse_state,
-            }
+            return await request
+        except Exception as err:
+            _LOGGER.warning(message, err)
+            return default
 
+    # Am Cache vorbei, sonst überdecken dessen TTLs das einstellbare Intervall;
+    # nur die statischen Gerätedetails dürfen aus dem Cache kommen
+    async def _load_evses():
+        evse_list = await client.get_evse_list(fresh=True)
+        details = await asyncio.gather(
+            *(client.get_evse_details(evse["uuid"]) for evse in evse_list)
+        )
+        return [{**evse, **detail} for evse, detail in zip(evse_list, details)]
+
+    async def _update_wallbox_config():
+        # Unabhängige Abfragen parallel; KsemClient begrenzt die Parallelität pro Host
+        try:
+            result, phase, config = await asyncio.gather(
+                _load_evses(),
+                _optional(
+                    client.get_phase_switching(fresh=True),
+                    {},
+                    "Phasenumschaltung konnte nicht geladen werden: %s",
+                ),
+                _optional(
+                    client.get_energyflow_config(fresh=True),
+                    {},
+                    "Energiefluss-Konfiguration konnte nicht geladen werden: %s",
+                ),
+            )
         except Exception as err:
             raise UpdateFailed(
                 f"Wallbox-Daten konnten nicht geladen werden: {err}"
             ) from err
 
-    async def _update_modbus():
+        return {
+            "evse": result,
+            "phase_usage_state": phase.get("phase_usage", 0),
+            "energyflow_config": config,
+        }
+
+    async def _update_wallbox_state():
         try:
-            return await modbus_client.read_all()  # liest das komplette Mapping
+            return {"evse_state": await client.get_evse_state()}
         except Exception as err:
-            raise UpdateFailed(f"Modbus-Fehler: {err}")
+            raise UpdateFailed(f"EVSE-Status konnte nicht geladen werden: {err}")
 
     smart_coordinator = DataUpdateCoordinator(
         hass,
@@ -90,25 +129,102 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         update_method=_update_smartmeter,
         update_interval=datetime.timedelta(seconds=30),
     )
-    wallbox_coordinator = DataUpdateCoordinator(
+    # Gleiche Datenschlüssel wie früher im gemeinsamen ksem_wallbox-Coordinator,
+    # nur nach Änderungshäufigkeit auf zwei Intervalle verteilt
+    wallbox_config_coordinator = DataUpdateCoordinator(
         hass,
         _LOGGER,
-        name="ksem_wallbox",
-        update_method=_update_wallbox,
-        update_interval=datetime.timedelta(seconds=30),
+        name="ksem_wallbox_config",
+        update_method=_update_wallbox_config,
+        update_interval=datetime.timedelta(
+            seconds=entry.options.get(
+                CONF_WALLBOX_CONFIG_INTERVAL, DEFAULT_WALLBOX_CONFIG_INTERVAL
+            )
+        ),
     )
-    modbus_coordinator = DataUpdateCoordinator(
+    wallbox_state_coordinator = DataUpdateCoordinator(
         hass,
         _LOGGER,
-        name="ksem_modbus_all",
-        update_method=_update_modbus,
-        update_interval=datetime.timedelta(seconds=10),
+        name="ksem_wallbox_state",
+        update_method=_update_wallbox_state,
+        update_interval=datetime.timedelta(
+            seconds=entry.options.get(
+                CONF_WALLBOX_STATE_INTERVAL, DEFAULT_WALLBOX_STATE_INTERVAL
+            )
+        ),
+    )
+    modbus_coordinator = KsemModbusCoordinator(
+        hass,
+        modbus_client,
+        update_interval=datetime.timedelta(seconds=modbus_client.update_interval),
     )
 
     await smart_coordinator.async_refresh()
-    await wallbox_coordinator.async_refresh()
+    await wallbox_config_coordinator.async_refresh()
+    await wallbox_state_coordinator.async_refresh()
     await modbus_coordinator.async_refresh()
 
+    rest_coordinator = KsemRestCoordinator(hass, client)
+    await rest_coordinator.async_refresh()
+
+    # Alle WebSocket-Themen laufen über den Manager des Eintrags; seine
+    # Verbindungen enden beim Entladen
+    websocket = KsemWebsocketManager(hass, entry, client, recorder)
+    # Zustandsänderungen aus WebSocket-Bursts gesammelt schreiben
+    coalescer = StateWriteCoalescer(
+        hass,
+        entry.options.get(CONF_WEBSOCKET_WRITE_WINDOW, DEFAULT_WEBSOCKET_WRITE_WINDOW)
+        / 1000,
+    )
+    entry.async_on_unload(coalescer.async_shutdown)
+
+    # Wallbox-Live-Werte per Push
+    gdr_coordinator = KsemGdrCoordinator(hass, websocket)
+    entry.async_on_unload(gdr_coordinator.async_start())
+
+    # Wallbox-Status per Push, Startwerte aus der EVSE-Liste
+    evse_state_coordinator = KsemEvseStateCoordinator(
+        hass,
+        client,
+        websocket,
+        (wallbox_config_coordinator.data or {}).get("evse", []),
+    )
+    entry.async_on_unload(evse_state_coordinator.async_start())
+
+    writer = ChargeModeWriter(hass, client)
+
+    @callback
+    def _chargemode_message(message):
+        if isinstance(message, dict) and message.get("topic", "").endswith(
+            "chargemode"
+        ):
+            _LOGGER.debug("Lademodus per WebSocket: %s", message.get("msg"))
+            # Modus und Quoten gleicht der Writer ab
+            writer.async_handle_echo(message.get("msg", {}))
+
+    entry.async_on_unload(websocket.async_subscribe("chargemode", _chargemode_message))
+
+    coordinators = (
+        smart_coordinator,
+        wallbox_config_coordinator,
+        wallbox_state_coordinator,
+        modbus_coordinator,
+        rest_coordinator,
+    )
+
+    def _health_changed(available: bool):
+        # Offline: alle Entitäten sofort unavailable, nicht erst nach Timeouts.
+        # Wieder online: alle Coordinators gemeinsam neu abfragen.
+        for coordinator in coordinators:
+            if available:
+                hass.async_create_task(coordinator.async_request_refresh())
+            else:
+                coordinator.async_set_update_error(
+                    CircuitOpen(f"KSEM {host} nicht erreichbar")
+                )
+
+    entry.async_on_unload(health.add_listener(_health_changed))
+
     info = await client.get_device_info()
     mac = info.get("Mac")
     serial = info.get("Serial")
@@ -130,16 +246,30 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     hass.data[DOMAIN][entry.entry_id] = {
         "client": client,
         "smart_coordinator": smart_coordinator,
-        "wallbox_coordinator": wallbox_coordinator,
+        "wallbox_config_coordinator": wallbox_config_coordinator,
+        "wallbox_state_coordinator": wallbox_state_coordinator,
         "modbus_coordinator": modbus_coordinator,
+        "modbus_client": modbus_client,
+        "rest_coordinator": rest_coordinator,
+        "gdr_coordinator": gdr_coordinator,
+        "evse_state_coordinator": evse_state_coordinator,
+        "websocket": websocket,
+        "write_coalescer": coalescer,
+        "chargemode_writer": writer,
         "device_info": device_info,
         "serial": serial,
     }
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    entry.async_on_unload(entry.add_update_listener(_async_update_options))
     return True
 
 
+async def _async_update_options(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Optionen geändert: Eintrag mit den neuen Intervallen neu laden"""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     unload_ok = all(
         [
@@ -148,5 +278,7 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         ]
     )
     if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id)
+        data = hass.data[DOMAIN].pop(entry.entry_id)
+        data["chargemode_writer"].async_shutdown()
+        await data["modbus_client"].disconnect()
     return unload_ok
@@ -1,9 +1,14 @@
+import asyncio
 import logging
 import datetime
+import time
 from typing import Union
-from aiohttp import ClientResponse
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from aiohttp import ClientConnectionError, ClientResponse, ClientSession
+from .capture import TrafficRecorder
+from .health import HostHealth
 from .helper import bearer_header
+from .http_session import create_session
+from .rest_stats import RestStats
 from homeassistant.components.sensor import (
     SensorEntity,
     SensorDeviceClass,
@@ -14,6 +19,9 @@ from .const import DOMAIN
 
 _LOGGER = logging.getLogger(__name__)
 
+# Der Webserver des KSEM ist langsam; mehr parallele Requests bringen nichts
+MAX_CONCURRENT_REQUESTS = 3
+
 
 class Tokens:
     """Hält Access-Token und Ablaufdatum"""
@@ -30,17 +38,222 @@ class InvalidAuth(Exception):
     """Fehlerhafte Authentifizierung"""
 
 
+# Wie lange (Sekunden) sich selten ändernde Antworten wiederverwendet werden.
+# Schreibzugriffe verwerfen die betroffenen Einträge sofort. Der
+# Wallbox-Konfigurations-Coordinator liest mit fresh=True, damit sein
+# einstellbares Intervall gilt; nur die statischen Gerätedetails (Modell,
+# Seriennummer, Firmware) kommen bis zu evse_details Sekunden aus dem Cache.
+CACHE_TTLS = {
+    "evse_list": 300,
+    "evse_details": 3600,
+    "energyflow_config": 300,
+    "phase_switching": 300,
+}
+
+
+class ResponseCache:
+    """Zwischenspeicher für GET-Antworten mit Ablaufzeit je Eintrag.
+
+    Gecachte Antworten werden unverändert herausgegeben und dürfen von
+    Aufrufern nicht verändert werden.
+    """
+
+    def __init__(self):
+        self._entries: dict[str, tuple[float, object]] = {}
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def get(self, path: str):
+        """Gespeicherte Antwort oder None, wenn nicht vorhanden/abgelaufen"""
+        entry = self._entries.get(path)
+        if entry is not None and time.monotonic() < entry[0]:
+            self.stats["hits"] += 1
+            return entry[1]
+        self.stats["misses"] += 1
+        return None
+
+    def set(self, path: str, data, ttl: float):
+        self._entries[path] = (time.monotonic() + ttl, data)
+
+    def invalidate(self, path: str):
+        """Verwirft path und alle übergeordneten Ressourcen.
+
+        Ein PUT auf /configuration/batteryusage ändert auch die Antwort von
+        GET /configuration.
+        """
+        for cached in list(self._entries):
+            if path == cached or path.startswith(cached + "/"):
+                del self._entries[cached]
+                self.stats["invalidations"] += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def as_dict(self) -> dict:
+        return {**self.stats, "entries": len(self._entries)}
+
+
+# Fehler, bei denen der KSEM gar nicht geantwortet hat (zählen für HostHealth)
+TRANSPORT_ERRORS = (ClientConnectionError, asyncio.TimeoutError, OSError)
+
+
+# Token so viele Sekunden vor Ablauf im Hintergrund erneuern
+TOKEN_REFRESH_MARGIN = 60
+
+
+class TokenManager:
+    """Teilt einen Login unter allen gleichzeitigen Aufrufern (Single-Flight).
+
+    Nur ein Login läuft zur Zeit; wer währenddessen ein Token braucht, wartet
+    auf dessen Ergebnis statt selbst einen weiteren Login zu starten. Kurz vor
+    Ablauf wird das Token im Hintergrund erneuert, damit Requests nicht auf
+    den Login warten müssen.
+    """
+
+    def __init__(self, login, refresh_margin: float = TOKEN_REFRESH_MARGIN):
+        self._login = login
+        self._refresh_margin = refresh_margin
+        self._lock = asyncio.Lock()
+        self._refresh_handle: asyncio.TimerHandle | None = None
+        self._refresh_task: asyncio.Task | None = None
+        self.token: Tokens | None = None
+        self.stats = {
+            "logins": 0,
+            "login_failures": 0,
+            "background_refreshes": 0,
+            "last_login_duration": None,
+            "total_login_duration": 0.0,
+        }
+
+    @staticmethod
+    def _valid(token: Tokens | None) -> bool:
+        return token is not None and datetime.datetime.now() < token.expire_date
+
+    async def async_get_token(self) -> Tokens:
+        """Gültiges Token, bei Bedarf mit (geteiltem) Login"""
+        token = self.token
+        if self._valid(token):
+            return token
+        return await self._async_refresh(token)
+
+    async def async_invalidate(self, stale: Tokens | None) -> Tokens:
+        """Token wurde abgelehnt: neu einloggen, außer ein anderer Aufrufer hat
+        das abgelehnte Token inzwischen schon ersetzt"""
+        return await self._async_refresh(stale)
+
+    async def _async_refresh(self, stale: Tokens | None) -> Tokens:
+        async with self._lock:
+            if self.token is not stale and self._valid(self.token):
+                return self.token
+            start = time.monotonic()
+            try:
+                token = await self._login()
+            except Exception:
+                self.stats["login_failures"] += 1
+                raise
+            duration = time.monotonic() - start
+            self.stats["logins"] += 1
+            self.stats["last_login_duration"] = round(duration, 3)
+            self.stats["total_login_duration"] += duration
+            self.token = token
+            self._schedule_refresh(token)
+            return token
+
+    def _schedule_refresh(self, token: Tokens):
+        self._cancel_refresh_timer()
+        lifetime = (token.expire_date - datetime.datetime.now()).total_seconds()
+        # Bei sehr kurzlebigen Tokens lohnt sich kein Vorab-Refresh
+        if lifetime <= 2 * self._refresh_margin:
+            return
+        loop = asyncio.get_running_loop()
+        self._refresh_handle = loop.call_later(
+            lifetime - self._refresh_margin, self._start_background_refresh
+        )
+
+    def _start_background_refresh(self):
+        self._refresh_handle = None
+        self._refresh_task = asyncio.get_running_loop().create_task(
+            self._async_background_refresh()
+        )
+
+    async def _async_background_refresh(self):
+        try:
+            await self._async_refresh(self.token)
+            self.stats["background_refreshes"] += 1
+        except Exception as err:
+            # Der nächste Request versucht es beim Ablauf erneut
+            _LOGGER.warning("Token-Refresh im Hintergrund fehlgeschlagen: %s", err)
+        finally:
+            self._refresh_task = None
+
+    def _cancel_refresh_timer(self):
+        if self._refresh_handle:
+            self._refresh_handle.cancel()
+            self._refresh_handle = None
+
+    def async_shutdown(self):
+        """Stoppt den Hintergrund-Refresh"""
+        self._cancel_refresh_timer()
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+
+
 class KsemClient:
     """Client für REST-Aufrufe an die KSEM API mit Token-Refresh"""
 
-    def __init__(self, hass, host: str, password: str) -> None:
+    def __init__(
+        self,
+        hass,
+        host: str,
+        password: str,
+        max_concurrency: int = MAX_CONCURRENT_REQUESTS,
+        session: ClientSession | None = None,
+        health: HostHealth | None = None,
+        recorder: TrafficRecorder | None = None,
+    ) -> None:
         self.hass = hass
         self.host = host.rstrip("/")
         self.password = password
-        self.token: Tokens | None = None
+        # Gemeinsam mit Modbus und WebSocket; ohne Angabe nur für REST
+        self.health = health or HostHealth(self.host)
+        self._owns_health = health is None
+        # Ohne übergebene Session bekommt jeder Client einen eigenen Pool, der
+        # nicht mit anderen Integrationen um Verbindungen konkurriert
+        self._session = session
+        self._owns_session = session is None
+        self._pool_size = max_concurrency
+        self.tokens = TokenManager(self._login)
+        self.cache = ResponseCache()
+        self.stats = RestStats()
+        self._request_limit = asyncio.Semaphore(max_concurrency)
+        # Optionaler Mitschnitt aller Antworten (Option capture_traffic)
+        self.recorder = recorder
         _LOGGER.debug("KsemClient initialisiert für Host %s", self.host)
 
-    async def _auth(self, session):
+    @property
+    def token(self) -> Tokens | None:
+        """Zuletzt ausgestelltes Token (kann abgelaufen sein)"""
+        return self.tokens.token
+
+    @property
+    def session(self) -> ClientSession:
+        """HTTP-Session des Clients, bei Bedarf (neu) angelegt"""
+        if self._session is None or (self._owns_session and self._session.closed):
+            self._session = create_session(pool_size=self._pool_size)
+        return self._session
+
+    async def async_close(self):
+        """Gibt Hintergrundaufgaben und die eigene HTTP-Session frei"""
+        self.tokens.async_shutdown()
+        if self._owns_health:
+            self.health.shutdown()
+        self.cache.clear()
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _login(self) -> Tokens:
+        session = self.session
         url = f"http://{self.host}/api/web-login/token"
         data = {
             "grant_type": "password",
@@ -50,59 +263,109 @@ class KsemClient:
             "password": self.password,
         }
         _LOGGER.debug("Auth POST %s", url)
-        resp = await session.post(url, data=data)
+        self.health.check()
+        try:
+            resp = await session.post(url, data=data)
+        except TRANSPORT_ERRORS as err:
+            self.health.record_failure(err)
+            raise
+        self.health.record_success()
         resp.raise_for_status()
         token_data = await resp.json()
         if "error" in token_data:
             raise InvalidAuth("Unauthorized")
-        self.token = Tokens(
+        return Tokens(
             token_data["access_token"],
             token_data.get("token_type", ""),
             token_data.get("expires_in", 0),
         )
 
+    async def _send(self, session, endpoint, method, url, token, headers, kwargs):
+        """Ein einzelner HTTP-Request samt Messung; liefert die Response mit
+        bereits gelesenem Body"""
+        request_headers = bearer_header(token.access_token)
+        if headers:
+            request_headers.update(headers)
+        start = time.monotonic()
+        try:
+            resp: ClientResponse = await session.request(
+                method, url, headers=request_headers, **kwargs
+            )
+            body = await resp.read()
+        except Exception as err:
+            endpoint.record_error(err, time.monotonic() - start)
+            if isinstance(err, TRANSPORT_ERRORS):
+                self.health.record_failure(err)
+            raise
+        endpoint.record(resp.status, time.monotonic() - start, len(body))
+        # Jede Antwort, auch ein HTTP-Fehler, zeigt: das Gerät ist erreichbar
+        self.health.record_success()
+        return resp
+
+    async def _request(self, method: str, path: str, headers=None, **kwargs):
+        # Offline-KSEM: sofort abbrechen statt in den Timeout zu laufen
+        self.health.check()
+        session = self.session
+        token = await self.tokens.async_get_token()
+        url = f"http://{self.host}{path}"
+        endpoint = self.stats.endpoint(method, path)
+        async with self._request_limit:
+            resp = await self._send(
+                session, endpoint, method, url, token, headers, kwargs
+            )
+            if resp.status in (401, 500):
+                _LOGGER.debug("Status %s, re-authenticating", resp.status)
+                endpoint.reauths += 1
+                token = await self.tokens.async_invalidate(token)
+                resp = await self._send(
+                    session, endpoint, method, url, token, headers, kwargs
+                )
+        if self.recorder is not None:
+            # Der Body ist bereits gelesen, read() liefert ihn aus dem Puffer
+            self.recorder.record_rest(method, path, resp.status, await resp.read())
+        return resp
+
     async def _put(
         self, path: str, data=None, json=None, headers=None, text_mode=False
     ) -> Union[dict, None]:
-        session = async_get_clientsession(self.hass)
-        if not self.token or datetime.datetime.now() > self.token.expire_date:
-            await self._auth(session)
-        url = f"http://{self.host}{path}"
-        default_headers = bearer_header(self.token.access_token)
-        if headers:
-            default_headers.update(headers)
-
-        _LOGGER.debug("PUT %s - Data: %s", url, json or data)
-        resp = await session.put(url, headers=default_headers, data=data, json=json)
-        if resp.status in (401, 500):
-            _LOGGER.debug("Status %s, re-authenticating", resp.status)
-            await self._auth(session)
-            default_headers = bearer_header(self.token.access_token)
-            resp = await session.put(url, headers=default_headers, data=data, json=json)
-
-        if resp.status == 204:
-            return None
-        resp.raise_for_status()
-        return await (resp.text() if text_mode else resp.json())
+        _LOGGER.debug("PUT %s%s - Data: %s", self.host, path, json or data)
+        try:
+            resp = await self._request(
+                "PUT", path, headers=headers, data=data, json=json
+            )
+            if resp.status == 204:
+                return None
+            resp.raise_for_status()
+            return await (resp.text() if text_mode else resp.json())
+        finally:
+            # Auch bei Fehlern: der Schreibzugriff kann angekommen sein
+            self.cache.invalidate(path)
 
-    async def _get(self, path: str) -> Union[dict, list]:
-        session = async_get_clientsession(self.hass)
-        if not self.token or datetime.datetime.now() > self.token.expire_date:
-            await self._auth(session)
-        url = f"http://{self.host}{path}"
-        headers = bearer_header(self.token.access_token)
-        _LOGGER.debug("GET %s", url)
-        resp: ClientResponse = await session.get(url, headers=headers)
-        if resp.status in (401, 500):
-            _LOGGER.debug("Status %s, re-authenticating", resp.status)
-            await self._auth(session)
-            headers = bearer_header(self.token.access_token)
-            resp = await session.get(url, headers=headers)
+    async def _get(
+        self, path: str, ttl: float | None = None, fresh: bool = False
+    ) -> Union[dict, list]:
+        """GET mit optionalem Cache; ttl=None fragt immer das Gerät.
+
+        fresh=True liest am Cache vorbei und legt die Antwort neu ab.
+        """
+        if ttl and not fresh:
+            data = self.cache.get(path)
+            if data is not None:
+                _LOGGER.debug("GET %s aus dem Cache", path)
+                return data
+        _LOGGER.debug("GET %s%s", self.host, path)
+        resp = await self._request("GET", path)
         resp.raise_for_status()
         data = await resp.json()
         _LOGGER.debug("Daten erhalten: %s", data)
+        if ttl:
+            self.cache.set(path, data, ttl)
         return data
 
+    async def get_resource(self, path: str, ttl: float | None = None):
+        """Beliebiger GET-Endpunkt, z. B. aus rest_registry"""
+        return await self._get(path, ttl=ttl)
+
     async def get_device_status(self) -> dict:
         _LOGGER.info("Hole Gerätestatus")
         return await self._get("/api/device-settings/deviceusage")
@@ -111,15 +374,23 @@ class KsemClient:
         _LOGGER.info("Hole Geräteinformationen")
         return await self._get("/api/device-settings")
 
-    async def get_evse_list(self):
-        """Liefert die Liste aller Wallboxen (EVSE) mit UUID etc."""
+    async def get_evse_list(self, fresh: bool = False):
+        """Liefert die Liste aller Wallboxen (EVSE) mit UUID etc.
+
+        fresh=True umgeht den Cache, z. B. nach einem WebSocket-Neuverbinden.
+        """
         _LOGGER.info("Hole Wallboxen-Liste")
-        return await self._get("/api/e-mobility/evselist")
+        return await self._get(
+            "/api/e-mobility/evselist", ttl=CACHE_TTLS["evse_list"], fresh=fresh
+        )
 
     async def get_evse_details(self, evse_id):
         """Liefert Geräte-Details einer Wallbox."""
         _LOGGER.info("Hole Wallbox-Details für ID %s", evse_id)
-        return await self._get("/api/evse-kostal/evse/" + evse_id + "/details")
+        return await self._get(
+            "/api/evse-kostal/evse/" + evse_id + "/details",
+            ttl=CACHE_TTLS["evse_details"],
+        )
 
     async def get_evse_state(self):
         """Liefert den aktuellen Status (z. B. charging) einer Wallbox."""
@@ -131,25 +402,17 @@ class KsemClient:
         mode: str | None = None,
         mincharginpowerquota: int | None = None,
         minpvpowerquota: int | None = None,
-        entry_id=None,
     ):
-        session = async_get_clientsession(self.hass)
-        await self._auth(session)
-        url = f"http://{self.host}/api/e-mobility/config/chargemode"
-
-        # Hole aktuelle Werte aus dem WebSocket-Cache
-        cache = (
-            self.hass.data.get("ksem", {}).get(entry_id, {}).get("last_chargemode", {})
-        )
-
+        # Nicht angegebene Felder: Standardwerte des KSEM; ChargeModeWriter
+        # übergibt immer den vollständigen Stand
         payload = {
-            "mode": mode or cache.get("mode", "lock"),
+            "mode": mode or "lock",
             "mincharginpowerquota": mincharginpowerquota
             if mincharginpowerquota is not None
-            else cache.get("mincharginpowerquota", 100),
+            else 100,
             "minpvpowerquota": minpvpowerquota
             if minpvpowerquota is not None
-            else cache.get("minpvpowerquota", 30),
+            else 30,
         }
 
         # Füge automatisch die letzten Werte und controlledby=0 hinzu
@@ -157,22 +420,27 @@ class KsemClient:
         payload["lastminpvpowerquota"] = payload["minpvpowerquota"]
         payload["controlledby"] = 0
 
-        headers = bearer_header(self.token.access_token)
-        _LOGGER.debug("PUT %s - Payload: %s", url, payload)
-        resp = await session.put(url, headers=headers, json=payload)
-        resp.raise_for_status()
+        await self._put("/api/e-mobility/config/chargemode", json=payload)
 
-    async def get_phase_switching(self):
-        return await self._get("/api/e-mobility/config/phaseswitching")
+    async def get_phase_switching(self, fresh: bool = False):
+        return await self._get(
+            "/api/e-mobility/config/phaseswitching",
+            ttl=CACHE_TTLS["phase_switching"],
+            fresh=fresh,
+        )
 
     async def set_phase_switching(self, phase_usage: int):
         await self._put(
             "/api/e-mobility/config/phaseswitching", json={"phase_usage": phase_usage}
         )
 
-    async def get_energyflow_config(self):
+    async def get_energyflow_config(self, fresh: bool = False):
         _LOGGER.info("Hole Configdaten von Energiefluss")
-        return await self._get("/api/kostal-energyflow/configuration")
+        return await self._get(
+            "/api/kostal-energyflow/configuration",
+            ttl=CACHE_TTLS["energyflow_config"],
+            fresh=fresh,
+        )
 
     async def set_battery_usage(self, enabled: bool):
         value = "true" if enabled else "false"
@@ -0,0 +1,46 @@
+import logging
+from homeassistant.components.binary_sensor import BinarySensorEntity
+from homeassistant.helpers.entity import EntityCategory
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from .const import DOMAIN
+from .rest_registry import REST_VALUES
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def async_setup_entry(hass, entry, async_add_entities):
+    data = hass.data[DOMAIN][entry.entry_id]
+    coordinator = data["rest_coordinator"]
+    device_info = data["device_info"]
+    wallbox_device_info = data.get("wallbox_device_info") or device_info
+
+    async_add_entities(
+        KsemRestBinarySensor(
+            coordinator,
+            value,
+            wallbox_device_info if value.device == "wallbox" else device_info,
+            data["serial"],
+        )
+        for value in REST_VALUES.values()
+        if value.platform == "binary_sensor"
+    )
+
+
+class KsemRestBinarySensor(CoordinatorEntity, BinarySensorEntity):
+    """Ja/Nein-Wert aus einem Endpunkt der REST-Tabelle (rest_registry)"""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(self, coordinator, value, device_info, serial):
+        super().__init__(coordinator)
+        self._key = value.key
+        self._attr_name = value.name
+        self._attr_unique_id = f"{serial}_api_{value.key}"
+        self._attr_device_class = value.device_class
+        self._attr_entity_registry_enabled_default = value.enabled_default
+        self._attr_device_info = device_info
+
+    @property
+    def is_on(self):
+        value = (self.coordinator.data or {}).get(self._key)
+        return None if value is None else bool(value)
@@ -0,0 +1,129 @@
+"""Mitschnitt des REST- und WebSocket-Verkehrs eines KSEM (JSONL, gzip).
+
+Eine Zeile pro Ereignis, t in Sekunden seit Beginn des Mitschnitts:
+
+    {"t": 1.25, "kind": "rest", "method": "GET", "path": "/api/...",
+     "status": 200, "text": "..."}
+    {"t": 1.31, "kind": "ws", "path": "json/json/local/evse/+/state",
+     "text": "..."}
+    {"t": 1.32, "kind": "ws", "path": "protobuf/gdr/local/values/+/evse",
+     "b64": "..."}
+
+Binäre Frames und Bodies stehen base64-kodiert in "b64". Der Login wird nicht
+mitgeschnitten, Passwörter und Tokens in JSON-Antworten werden geschwärzt.
+Geschrieben wird in einem eigenen Thread, damit die Event-Loop nie auf die
+Platte wartet. benchmarks/ksem_replay.py spielt einen Mitschnitt wieder ab.
+"""
+
+import asyncio
+import base64
+import gzip
+import json
+import logging
+import queue
+import threading
+import time
+
+_LOGGER = logging.getLogger(__name__)
+
+REDACT_KEYS = {"password", "access_token", "refresh_token"}
+REDACTED = "**REDACTED**"
+
+
+def _redact(data):
+    if isinstance(data, dict):
+        return {
+            key: REDACTED if key in REDACT_KEYS else _redact(value)
+            for key, value in data.items()
+        }
+    if isinstance(data, list):
+        return [_redact(value) for value in data]
+    return data
+
+
+def _payload(data) -> dict:
+    """Body bzw. Frame als {"text": ...} oder {"b64": ...}"""
+    if isinstance(data, str):
+        return {"text": data}
+    try:
+        text = data.decode("utf-8")
+    except UnicodeDecodeError:
+        return {"b64": base64.b64encode(data).decode("ascii")}
+    try:
+        parsed = json.loads(text)
+    except ValueError:
+        return {"text": text}
+    return {"text": json.dumps(_redact(parsed), separators=(",", ":"))}
+
+
+class TrafficRecorder:
+    """Schreibt REST-Antworten und WebSocket-Frames in eine .jsonl.gz-Datei"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._start = time.monotonic()
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        # False, sobald die Datei nicht mehr schreibbar ist
+        self.active = True
+        self._thread = threading.Thread(
+            target=self._run, name="ksem_capture", daemon=True
+        )
+        self._thread.start()
+        self.stats = {"rest": 0, "ws": 0}
+
+    def _elapsed(self) -> float:
+        return round(time.monotonic() - self._start, 4)
+
+    def record_rest(self, method: str, path: str, status: int, body: bytes):
+        if not self.active:
+            return
+        self.stats["rest"] += 1
+        self._queue.put(
+            {
+                "t": self._elapsed(),
+                "kind": "rest",
+                "method": method,
+                "path": path,
+                "status": status,
+                **_payload(body),
+            }
+        )
+
+    def record_ws(self, path: str, frame):
+        """frame: str (JSON-Themen) oder bytes (Protobuf)"""
+        if not self.active:
+            return
+        self.stats["ws"] += 1
+        event = {"t": self._elapsed(), "kind": "ws", "path": path}
+        if isinstance(frame, str):
+            event["text"] = frame
+        else:
+            event["b64"] = base64.b64encode(frame).decode("ascii")
+        self._queue.put(event)
+
+    def _run(self):
+        try:
+            with gzip.open(self.path, "wt", encoding="utf-8") as file:
+                while True:
+                    event = self._queue.get()
+                    if event is None:
+                        return
+                    file.write(json.dumps(event, separators=(",", ":")) + "\n")
+        except OSError as err:
+            self.active = False
+            _LOGGER.error("Mitschnitt %s nicht schreibbar: %s", self.path, err)
+
+    def close(self):
+        """Restliche Ereignisse schreiben und die Datei schließen (blockiert)"""
+        self.active = False
+        self._queue.put(None)
+        self._thread.join()
+
+    async def async_close(self):
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+        _LOGGER.info(
+            "Mitschnitt %s geschlossen (%s REST, %s WebSocket)",
+            self.path,
+            self.stats["rest"],
+            self.stats["ws"],
+        )
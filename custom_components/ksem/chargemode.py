@@ -0,0 +1,186 @@
+"""Gebündelte Schreibzugriffe auf den Lademodus der Wallbox"""
+
+import asyncio
+import logging
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+
+_LOGGER = logging.getLogger(__name__)
+
+# Änderungen innerhalb dieses Fensters (Sekunden) landen in einem gemeinsamen PUT
+WRITE_DELAY = 0.5
+
+# So lange (Sekunden) bleibt der geschriebene Wert optimistisch sichtbar, bis der
+# chargemode-WebSocket ihn bestätigt
+ECHO_TIMEOUT = 10
+
+CHARGEMODE_KEYS = ("mode", "mincharginpowerquota", "minpvpowerquota")
+
+
+class ChargeModeWriter:
+    """Bündelt Änderungen an Lademodus und Quoten zu einem einzigen PUT.
+
+    Entitäten übergeben ihre Änderung mit async_set und sehen sofort den
+    gewünschten Wert (optimistisch). Alle Änderungen innerhalb von WRITE_DELAY
+    werden zusammengeführt und mit einem PUT geschrieben. Das Echo des
+    chargemode-WebSockets bestätigt den Schreibzugriff; ältere Echos, die
+    während des Schreibens eintreffen, setzen die Anzeige nicht zurück.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        client,
+        delay: float = WRITE_DELAY,
+        echo_timeout: float = ECHO_TIMEOUT,
+    ):
+        self.hass = hass
+        self._client = client
+        self._delay = delay
+        self._echo_timeout = echo_timeout
+        # Vom Gerät gemeldet / geschrieben, aber unbestätigt / noch nicht geschrieben
+        self._confirmed: dict = {}
+        self._inflight: dict = {}
+        self._pending: dict = {}
+        self._batch: asyncio.Future | None = None
+        # Alle Flush-Tasks; ein älterer kann noch im PUT stecken, wenn schon
+        # der nächste wartet
+        self._flush_tasks: set[asyncio.Task] = set()
+        self._echo_handle: asyncio.TimerHandle | None = None
+        self._echo_seen = False
+        self._write_lock = asyncio.Lock()
+        self._listeners: list = []
+        self.stats = {
+            "changes": 0,
+            "writes": 0,
+            "write_failures": 0,
+            "echoes": 0,
+            "echo_timeouts": 0,
+        }
+
+    @property
+    def state(self) -> dict:
+        """Aktueller Lademodus inklusive noch unbestätigter Änderungen"""
+        return {**self._confirmed, **self._inflight, **self._pending}
+
+    @callback
+    def async_add_listener(self, update_callback) -> CALLBACK_TYPE:
+        """Ruft update_callback bei jeder Änderung von state auf"""
+        self._listeners.append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            self._listeners.remove(update_callback)
+
+        return remove_listener
+
+    @callback
+    def _notify(self):
+        for update_callback in list(self._listeners):
+            update_callback()
+
+    async def async_set(self, **changes):
+        """Merkt Änderungen vor und wartet, bis der gemeinsame PUT durch ist"""
+        changes = {key: value for key, value in changes.items() if value is not None}
+        unknown = set(changes) - set(CHARGEMODE_KEYS)
+        if unknown:
+            raise ValueError(f"Unbekannte Lademodus-Felder: {sorted(unknown)}")
+        if not changes:
+            return
+
+        self.stats["changes"] += 1
+        self._pending.update(changes)
+        if self._batch is None:
+            self._batch = self.hass.loop.create_future()
+            # Fehler gelten als abgeholt, auch wenn kein Aufrufer mehr wartet
+            self._batch.add_done_callback(
+                lambda fut: fut.cancelled() or fut.exception()
+            )
+            task = self.hass.async_create_task(self._async_flush_later())
+            self._flush_tasks.add(task)
+            task.add_done_callback(self._flush_tasks.discard)
+        batch = self._batch
+        self._notify()
+        await asyncio.shield(batch)
+
+    async def _async_flush_later(self):
+        await asyncio.sleep(self._delay)
+        # Ein neuer PUT startet erst, wenn der vorherige beantwortet ist
+        async with self._write_lock:
+            changes, self._pending = self._pending, {}
+            batch, self._batch = self._batch, None
+            values = {**self._confirmed, **self._inflight, **changes}
+            _LOGGER.debug("Schreibe Lademodus %s (Änderungen %s)", values, changes)
+            try:
+                await self._client.set_charge_mode(
+                    mode=values.get("mode"),
+                    mincharginpowerquota=values.get("mincharginpowerquota"),
+                    minpvpowerquota=values.get("minpvpowerquota"),
+                )
+            except asyncio.CancelledError:
+                # Entladen während des PUTs: wartende Aufrufer nicht hängen
+                # lassen (vor dem Tausch bricht async_shutdown den Batch ab)
+                batch.cancel()
+                raise
+            except Exception as err:
+                self.stats["write_failures"] += 1
+                _LOGGER.warning("Lademodus konnte nicht gesetzt werden: %s", err)
+                # Optimistische Werte zurücknehmen
+                self._notify()
+                batch.set_exception(err)
+                return
+
+            self.stats["writes"] += 1
+            self._inflight.update(changes)
+            self._echo_seen = False
+            if self._echo_handle:
+                self._echo_handle.cancel()
+            self._echo_handle = self.hass.loop.call_later(
+                self._echo_timeout, self._async_echo_timeout
+            )
+            batch.set_result(None)
+
+    @callback
+    def async_handle_echo(self, msg_data: dict):
+        """Verarbeitet eine chargemode-Nachricht des WebSockets"""
+        echo = {key: msg_data[key] for key in CHARGEMODE_KEYS if key in msg_data}
+        self.stats["echoes"] += 1
+        self._confirmed.update(echo)
+        if self._inflight:
+            self._echo_seen = True
+            if all(echo.get(key) == value for key, value in self._inflight.items()):
+                self._inflight.clear()
+                if self._echo_handle:
+                    self._echo_handle.cancel()
+                    self._echo_handle = None
+        self._notify()
+
+    @callback
+    def _async_echo_timeout(self):
+        self._echo_handle = None
+        self.stats["echo_timeouts"] += 1
+        if self._echo_seen:
+            # Das Gerät hat andere Werte gemeldet als geschrieben, es gewinnt
+            _LOGGER.debug(
+                "Lademodus %s nicht bestätigt, Gerät meldet %s",
+                self._inflight,
+                self._confirmed,
+            )
+        else:
+            # Kein Echo (z. B. WebSocket getrennt): PUT war erfolgreich
+            self._confirmed.update(self._inflight)
+        self._inflight.clear()
+        self._notify()
+
+    @callback
+    def async_shutdown(self):
+        """Bricht ausstehende Schreibzugriffe ab"""
+        for task in list(self._flush_tasks):
+            task.cancel()
+        if self._batch and not self._batch.done():
+            self._batch.cancel()
+        self._batch = None
+        if self._echo_handle:
+            self._echo_handle.cancel()
+            self._echo_handle = None
+        self._listeners.clear()
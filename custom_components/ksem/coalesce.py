@@ -0,0 +1,64 @@
+"""Gebündelte Zustandsschreibvorgänge für Entitäten mit WebSocket-Push.
+
+Bei Bursts (mehrere chargemode- oder GDR-Frames kurz hintereinander) würde
+jede Nachricht jede betroffene Entität einzeln in die State Machine schreiben,
+samt Recorder-Event für Zwischenwerte. Entitäten melden Änderungen daher mit
+async_schedule an; innerhalb des Fensters wird jede Entität höchstens einmal
+und mit ihrem letzten Wert geschrieben. Fenster 0 fasst alles zusammen, was
+im selben Tick der Event-Loop eintrifft.
+"""
+
+import asyncio
+import logging
+
+from homeassistant.core import HomeAssistant, callback
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class StateWriteCoalescer:
+    """Schreibt angemeldete Entitäten gesammelt nach Ablauf des Fensters"""
+
+    def __init__(self, hass: HomeAssistant, window: float):
+        self.hass = hass
+        self.window = window
+        # Reihenfolge der ersten Anmeldung bleibt erhalten
+        self._pending: dict = {}
+        self._handle: asyncio.Handle | None = None
+        self.stats = {"updates": 0, "writes": 0, "flushes": 0}
+
+    @callback
+    def async_schedule(self, entity):
+        """Zustand von entity spätestens nach Ablauf des Fensters schreiben"""
+        self.stats["updates"] += 1
+        self._pending[entity] = None
+        if self._handle is not None:
+            return
+        if self.window > 0:
+            self._handle = self.hass.loop.call_later(self.window, self._async_flush)
+        else:
+            self._handle = self.hass.loop.call_soon(self._async_flush)
+
+    @callback
+    def async_discard(self, entity):
+        """Beim Entfernen der Entität: ausstehenden Schreibvorgang verwerfen"""
+        self._pending.pop(entity, None)
+
+    @callback
+    def _async_flush(self):
+        self._handle = None
+        pending, self._pending = self._pending, {}
+        self.stats["flushes"] += 1
+        for entity in pending:
+            self.stats["writes"] += 1
+            try:
+                entity.async_write_ha_state()
+            except Exception:
+                _LOGGER.exception("Zustand von %s nicht geschrieben", entity.entity_id)
+
+    @callback
+    def async_shutdown(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        self._pending.clear()
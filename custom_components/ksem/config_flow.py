@@ -1,8 +1,19 @@
 import logging
 import voluptuous as vol
 from homeassistant import config_entries
+from homeassistant.core import callback
 
-from .const import DOMAIN
+from .const import (
+    CONF_CAPTURE_TRAFFIC,
+    CONF_MODBUS_PIPELINING,
+    CONF_WALLBOX_CONFIG_INTERVAL,
+    CONF_WALLBOX_STATE_INTERVAL,
+    CONF_WEBSOCKET_WRITE_WINDOW,
+    DEFAULT_WALLBOX_CONFIG_INTERVAL,
+    DEFAULT_WALLBOX_STATE_INTERVAL,
+    DEFAULT_WEBSOCKET_WRITE_WINDOW,
+    DOMAIN,
+)
 from .api import KsemClient, InvalidAuth
 
 _LOGGER = logging.getLogger(__name__)
@@ -16,6 +27,11 @@ class KsemConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for KSEM."""
     VERSION = 1
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry):
+        return KsemOptionsFlow(config_entry)
+
     async def async_step_user(self, user_input=None):
         errors = {}
         _LOGGER.debug("Starte Config-Flow mit Input: %s", user_input)
@@ -30,4 +46,48 @@ class KsemConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 errors["base"] = "unknown"
             else:
                 return self.async_create_entry(title=user_input["host"], data=user_input)
+            finally:
+                await client.async_close()
         return self.async_show_form(step_id="user", data_schema=DATA_SCHEMA, errors=errors)
+
+
+class KsemOptionsFlow(config_entries.OptionsFlow):
+    """Abfrageintervalle der Wallbox und Modbus-Pipelining"""
+
+    def __init__(self, config_entry):
+        self._entry = config_entry
+
+    async def async_step_init(self, user_input=None):
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        options = self._entry.options
+        schema = vol.Schema({
+            vol.Required(
+                CONF_WALLBOX_STATE_INTERVAL,
+                default=options.get(
+                    CONF_WALLBOX_STATE_INTERVAL, DEFAULT_WALLBOX_STATE_INTERVAL
+                ),
+            ): vol.All(vol.Coerce(int), vol.Range(min=1, max=300)),
+            vol.Required(
+                CONF_WALLBOX_CONFIG_INTERVAL,
+                default=options.get(
+                    CONF_WALLBOX_CONFIG_INTERVAL, DEFAULT_WALLBOX_CONFIG_INTERVAL
+                ),
+            ): vol.All(vol.Coerce(int), vol.Range(min=30, max=86400)),
+            vol.Required(
+                CONF_WEBSOCKET_WRITE_WINDOW,
+                default=options.get(
+                    CONF_WEBSOCKET_WRITE_WINDOW, DEFAULT_WEBSOCKET_WRITE_WINDOW
+                ),
+            ): vol.All(vol.Coerce(int), vol.Range(min=0, max=5000)),
+            vol.Required(
+                CONF_MODBUS_PIPELINING,
+                default=options.get(CONF_MODBUS_PIPELINING, False),
+            ): bool,
+            vol.Required(
+                CONF_CAPTURE_TRAFFIC,
+                default=options.get(CONF_CAPTURE_TRAFFIC, False),
+            ): bool,
+        })
+        return self.async_show_form(step_id="init", data_schema=schema)
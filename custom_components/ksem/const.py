@@ -1,3 +1,21 @@
 """Konstanten für KSEM Component"""
 
 DOMAIN = "ksem"
+
+# Optionen
+CONF_MODBUS_PIPELINING = "modbus_pipelining"
+CONF_WALLBOX_STATE_INTERVAL = "wallbox_state_interval"
+CONF_WALLBOX_CONFIG_INTERVAL = "wallbox_config_interval"
+CONF_WEBSOCKET_WRITE_WINDOW = "websocket_write_window"
+# REST- und WebSocket-Verkehr nach <config>/ksem_capture_*.jsonl.gz mitschneiden
+CONF_CAPTURE_TRAFFIC = "capture_traffic"
+
+# Standard-Intervalle in Sekunden: Live-Status der Wallbox (Abregelung,
+# Ladeleistung) schnell, Konfiguration (EVSE-Liste, Phasen, Energiefluss) selten
+DEFAULT_WALLBOX_STATE_INTERVAL = 5
+DEFAULT_WALLBOX_CONFIG_INTERVAL = 300
+
+# Zeitfenster in Millisekunden, in dem WebSocket-getriebene Zustandsänderungen
+# einer Entität zu einem Schreibvorgang zusammengefasst werden (0 = pro Tick
+# der Event-Loop)
+DEFAULT_WEBSOCKET_WRITE_WINDOW = 250
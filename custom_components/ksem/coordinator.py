@@ -0,0 +1,314 @@
+"""Coordinators für Modbus-Daten, zusätzliche REST-Endpunkte und WebSocket-Streams"""
+
+import asyncio
+import datetime
+import logging
+import time
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+
+from .modbus_helper import KsemModbusClient
+from .modbus_map import SENSOR_DEFINITIONS
+from .modbus_plan import compile_deadbands
+from .rest_registry import REST_ENDPOINTS
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def exceeds_deadband(old, new, deadband) -> bool:
+    """True, wenn die Änderung von old auf new veröffentlicht werden soll"""
+    if old is None or deadband is None:
+        return old != new
+    try:
+        delta = abs(new - old)
+    except TypeError:
+        return old != new
+    absolute, relative = deadband
+    return delta > 0 and delta >= max(absolute, relative * abs(old))
+
+
+class KsemModbusCoordinator(DataUpdateCoordinator):
+    """Veröffentlicht nur Werte, die sich über ihr Totband hinaus geändert haben.
+
+    Entitäten melden sich zusätzlich zum üblichen Listener mit ihrem
+    Snapshot-Schlüssel an (async_add_value_listener) und werden nur geweckt,
+    wenn sich genau dieser Wert geändert hat. Nach Fehlern und beim ersten
+    Lauf werden wie gewohnt alle Listener benachrichtigt.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        client: KsemModbusClient,
+        update_interval,
+        sensor_defs=SENSOR_DEFINITIONS,
+    ):
+        super().__init__(
+            hass,
+            _LOGGER,
+            name="ksem_modbus_all",
+            update_interval=update_interval,
+        )
+        self.client = client
+        self._deadbands = compile_deadbands(sensor_defs)
+        # None = alle Listener benachrichtigen
+        self._changed: set | None = None
+        self._all_notified = False
+        # Snapshot-Schlüssel -> Update-Callbacks der Entitäten
+        self._value_listeners: dict[str, list[CALLBACK_TYPE]] = {}
+        self.stats = {"updates": 0, "values_read": 0, "values_published": 0}
+
+    async def _async_update_data(self):
+        try:
+            snapshot = await self.client.read_due()  # nur fällige Poll-Klassen
+        except Exception as err:
+            raise UpdateFailed(f"Modbus-Fehler: {err}") from err
+
+        previous = self.data or {}
+        published = {}
+        changed = set()
+        deadbands = self._deadbands
+        for key, value in snapshot.items():
+            old = previous.get(key)
+            deadband = deadbands.get(key)
+            if key in previous and not exceeds_deadband(old, value, deadband):
+                published[key] = old
+            else:
+                published[key] = value
+                changed.add(key)
+
+        self.stats["updates"] += 1
+        self.stats["values_read"] += len(snapshot)
+        self.stats["values_published"] += len(changed)
+        self._changed = changed
+        return published
+
+    @callback
+    def async_add_value_listener(
+        self, key: str, update_callback: CALLBACK_TYPE
+    ) -> CALLBACK_TYPE:
+        """update_callback nur bei Änderung des Werts key aufrufen"""
+        callbacks = self._value_listeners.setdefault(key, [])
+        callbacks.append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            callbacks.remove(update_callback)
+            if not callbacks:
+                self._value_listeners.pop(key, None)
+
+        return remove_listener
+
+    @callback
+    def async_update_listeners(self) -> None:
+        changed, self._changed = self._changed, None
+        broadcast = changed is None or not self._all_notified
+        if broadcast or not self.last_update_success:
+            self._all_notified = self.last_update_success
+            super().async_update_listeners()
+            return
+        for key in changed:
+            for update_callback in list(self._value_listeners.get(key, ())):
+                update_callback()
+
+
+class KsemRestCoordinator(DataUpdateCoordinator):
+    """Fragt die Endpunkte aus rest_registry nach ihrem eigenen Intervall ab.
+
+    Der Coordinator tickt im kürzesten Endpunkt-Intervall; pro Tick werden alle
+    fälligen Endpunkte gemeinsam und parallel abgefragt. Fällt ein Endpunkt
+    aus, behalten seine Entitäten den letzten Wert und er wird im nächsten Tick
+    erneut versucht; als fehlgeschlagen gilt das Update erst, wenn noch gar
+    keine Daten vorliegen.
+    """
+
+    def __init__(self, hass: HomeAssistant, client, endpoints=REST_ENDPOINTS):
+        super().__init__(
+            hass,
+            _LOGGER,
+            name="ksem_rest",
+            update_interval=datetime.timedelta(
+                seconds=min(endpoint.interval for endpoint in endpoints)
+            ),
+        )
+        self.client = client
+        self.endpoints = tuple(endpoints)
+        self._next_due: dict[str, float] = {}
+        self._failing: set[str] = set()
+
+    def _due(self, now: float) -> list:
+        # Etwas Spielraum, damit ein knapp zu früher Tick nicht ein ganzes
+        # Intervall verschenkt
+        slack = self.update_interval.total_seconds() / 4
+        return [
+            endpoint
+            for endpoint in self.endpoints
+            if self._next_due.get(endpoint.key, 0) <= now + slack
+        ]
+
+    async def _async_update_data(self):
+        now = time.monotonic()
+        due = self._due(now)
+        results = await asyncio.gather(
+            *(self.client.get_resource(endpoint.path) for endpoint in due),
+            return_exceptions=True,
+        )
+
+        data = dict(self.data or {})
+        failed = []
+        for endpoint, result in zip(due, results):
+            if isinstance(result, Exception):
+                if endpoint.key not in self._failing:
+                    # Nur beim Übergang warnen, nicht bei jedem Tick erneut
+                    _LOGGER.warning(
+                        "REST-Endpunkt %s fehlgeschlagen: %s", endpoint.path, result
+                    )
+                self._failing.add(endpoint.key)
+                failed.append(f"{endpoint.key}: {result}")
+                continue
+            if endpoint.key in self._failing:
+                self._failing.discard(endpoint.key)
+                _LOGGER.info("REST-Endpunkt %s wieder erreichbar", endpoint.path)
+            data.update(endpoint.parse(result))
+            self._next_due[endpoint.key] = now + endpoint.interval
+
+        if failed and not data:
+            raise UpdateFailed("REST-Endpunkte fehlgeschlagen: " + "; ".join(failed))
+        return data
+
+
+class KsemGdrCoordinator(DataUpdateCoordinator):
+    """Push-Coordinator für die Wallbox-Live-Werte aus dem GDR-WebSocket.
+
+    Pollt nicht: der WebSocket-Manager liefert jeden dekodierten Frame, der
+    sofort veröffentlicht wird. data ist {EVSE-UUID: GDR} (siehe
+    gdr.decode_gdr); ein Frame mit nur einem Teil der Werte überschreibt nur
+    diese, der Rest bleibt erhalten. Ist die Verbindung getrennt, werden die
+    Entitäten unavailable.
+    """
+
+    def __init__(self, hass: HomeAssistant, websocket):
+        super().__init__(hass, _LOGGER, name="ksem_gdr")
+        self._websocket = websocket
+
+    @callback
+    def async_start(self) -> CALLBACK_TYPE:
+        """Abonniert den GDR-Stream; liefert die Funktion zum Abmelden"""
+        return self._websocket.async_subscribe(
+            "gdr", self.async_handle_gdrs, self._async_connection_changed
+        )
+
+    async def _async_update_data(self):
+        # Kein Polling; ein manueller Refresh liefert den letzten Stand
+        return self.data or {}
+
+    @callback
+    def async_handle_gdrs(self, gdrs: dict):
+        """Dekodierten Frame {UUID: GDR} in data übernehmen"""
+        if not gdrs:
+            return
+        data = dict(self.data or {})
+        for uuid, gdr in gdrs.items():
+            old = data.get(uuid)
+            if old is not None:
+                gdr = {
+                    **old,
+                    **{k: v for k, v in gdr.items() if v is not None},
+                    "values": {**old["values"], **gdr["values"]},
+                    "flexValues": {**old["flexValues"], **gdr["flexValues"]},
+                }
+            data[uuid] = gdr
+        self.async_set_updated_data(data)
+
+    @callback
+    def _async_connection_changed(self, connected: bool):
+        if not connected and self.data is not None:
+            self.async_set_update_error(ConnectionError("GDR-WebSocket getrennt"))
+
+
+class KsemEvseStateCoordinator(DataUpdateCoordinator):
+    """Push-Coordinator für den Status jeder Wallbox aus evse/+/state.
+
+    data ist {EVSE-UUID: {"state": ..., "parent_state": ...}}. Die Startwerte
+    kommen aus der EVSE-Liste der Einrichtung; jeder Frame aktualisiert seine
+    Wallbox sofort. Nach einem Neuverbinden wird die EVSE-Liste einmal per REST
+    nachgeladen, um verpasste Wechsel aufzuholen. Kein Polling.
+    """
+
+    def __init__(self, hass: HomeAssistant, client, websocket, evses=()):
+        super().__init__(hass, _LOGGER, name="ksem_evse_state")
+        self.client = client
+        self._websocket = websocket
+        self._was_connected = False
+        self._resync_task: asyncio.Task | None = None
+        self.data = {
+            evse["uuid"]: {"state": evse.get("state"), "parent_state": None}
+            for evse in evses
+            if evse.get("uuid")
+        }
+        self.stats = {"messages": 0, "changes": 0, "resyncs": 0}
+
+    @callback
+    def async_start(self) -> CALLBACK_TYPE:
+        """Abonniert den State-Stream; liefert die Funktion zum Abmelden"""
+        return self._websocket.async_subscribe(
+            "evse_state", self.async_handle_message, self._async_connection_changed
+        )
+
+    async def _async_update_data(self):
+        # Kein Polling; ein manueller Refresh liefert den letzten Stand
+        return self.data
+
+    @callback
+    def async_handle_message(self, message):
+        """{"topic": ".../evse/<UUID>/state", "msg": {"evse-id", "state", ...}}"""
+        if not isinstance(message, dict) or not isinstance(message.get("msg"), dict):
+            return
+        msg = message["msg"]
+        uuid = msg.get("evse-id")
+        if not uuid:
+            parts = message.get("topic", "").split("/")
+            uuid = parts[-2] if len(parts) > 1 else None
+        if not uuid:
+            return
+        self.stats["messages"] += 1
+        state = {
+            "state": msg.get("state"),
+            "parent_state": msg.get("parentState") or None,
+        }
+        if self.data.get(uuid) == state and self.last_update_success:
+            return
+        self.stats["changes"] += 1
+        self.async_set_updated_data({**self.data, uuid: state})
+
+    @callback
+    def _async_connection_changed(self, connected: bool):
+        if not connected:
+            self.async_set_update_error(
+                ConnectionError("EVSE-State-WebSocket getrennt")
+            )
+            return
+        if self._was_connected and not self._resync_task:
+            self._resync_task = self.hass.async_create_task(self._async_resync())
+        self._was_connected = True
+
+    async def _async_resync(self):
+        try:
+            evses = await self.client.get_evse_list(fresh=True)
+        except Exception as err:
+            _LOGGER.warning("EVSE-Status konnte nicht nachgeladen werden: %s", err)
+            return
+        finally:
+            self._resync_task = None
+        self.stats["resyncs"] += 1
+        data = dict(self.data)
+        for evse in evses:
+            uuid = evse.get("uuid")
+            if uuid:
+                old = data.get(uuid, {})
+                data[uuid] = {
+                    "state": evse.get("state"),
+                    "parent_state": old.get("parent_state"),
+                }
+        self.async_set_updated_data(data)
@@ -0,0 +1,42 @@
+"""Diagnosedaten für KSEM (Einstellungen > Geräte > Diagnose herunterladen)"""
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+
+TO_REDACT = {"password"}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict:
+    data = hass.data[DOMAIN][entry.entry_id]
+    client = data["client"]
+    modbus_client = data["modbus_client"]
+    return {
+        "entry": async_redact_data(entry.as_dict(), TO_REDACT),
+        "rest": {
+            "totals": client.stats.totals(),
+            "endpoints": client.stats.as_dict(),
+        },
+        "health": client.health.as_dict(),
+        "tokens": client.tokens.stats,
+        "cache": client.cache.as_dict(),
+        "chargemode_writer": data["chargemode_writer"].stats,
+        "websocket": {
+            "connected": data["websocket"].connected,
+            "topics": data["websocket"].stats,
+            "state_writes": data["write_coalescer"].stats,
+        },
+        "modbus": {
+            "connection": modbus_client.connection_stats,
+            "pipelining": modbus_client.pipelining,
+            "update_interval": modbus_client.update_interval,
+            "plans": {
+                tier: plan.stats() for tier, plan in modbus_client.plans.items()
+            },
+            "coordinator": data["modbus_coordinator"].stats,
+        },
+    }
@@ -0,0 +1,214 @@
+"""Decoder für die Protobuf-Frames des GDR-WebSockets (Wallbox-Live-Werte).
+
+ws://<host>/api/data-transfer/ws/protobuf/gdr/local/values/+/evse liefert
+gdr.GDRs-Nachrichten. Statt einer protobuf-Abhängigkeit liest dieses Modul das
+Wire-Format direkt; erwartet wird folgender Aufbau (Feldnummern unten als
+Konstanten):
+
+    message GDRs { map<string, GDR> GDRs = 1; }
+    message GDR {
+        string id = 1;
+        int32 status = 2;
+        Timestamp | uint64 timestamp = 3;  // Sekunden
+        map<string | uint64, double> values = 4;  // OBIS -> Messwert
+        map<string, FlexValue> flexValues = 5;
+    }
+
+Unbekannte Felder werden übersprungen. OBIS-Schlüssel, die als uint64 (sechs
+Bytes A-F) kommen, werden in die Schreibweise "A-B:C.D.E*F" umgesetzt, Zahlen
+aus double, float und varint gleichermaßen gelesen.
+"""
+
+import struct
+
+# Feldnummern
+GDRS_ENTRIES = 1
+GDR_ID = 1
+GDR_STATUS = 2
+GDR_TIMESTAMP = 3
+GDR_VALUES = 4
+GDR_FLEX_VALUES = 5
+MAP_KEY = 1
+MAP_VALUE = 2
+TIMESTAMP_SECONDS = 1
+
+# Wire-Typen
+WIRE_VARINT = 0
+WIRE_I64 = 1
+WIRE_LEN = 2
+WIRE_I32 = 5
+
+_DOUBLE = struct.Struct("<d")
+_FLOAT = struct.Struct("<f")
+
+# Wallbox-Messwerte aus dem GDR-Stream: OBIS -> (Name, Einheit, Faktor,
+# Device-Class, State-Class). Schlüssel und Faktoren nach dem Beispiel in
+# api.md ("1-0:32.4.0*255": 229 V, "1-0:31.7.0*255": 16 A), also unskaliert.
+GDR_SENSORS = {
+    "1-0:1.4.0*255": ("Ladeleistung", "W", 1, "power", "measurement"),
+    "1-0:1.8.0*255": ("Geladene Energie", "Wh", 1, "energy", "total_increasing"),
+    "1-0:31.7.0*255": ("Strom L1", "A", 1, "current", "measurement"),
+    "1-0:51.7.0*255": ("Strom L2", "A", 1, "current", "measurement"),
+    "1-0:71.7.0*255": ("Strom L3", "A", 1, "current", "measurement"),
+    "1-0:32.4.0*255": ("Spannung L1", "V", 1, "voltage", "measurement"),
+    "1-0:52.4.0*255": ("Spannung L2", "V", 1, "voltage", "measurement"),
+    "1-0:72.4.0*255": ("Spannung L3", "V", 1, "voltage", "measurement"),
+}
+
+# Schlüssel und Faktor noch nicht an einem Gerät bestätigt (api.md nennt nur
+# Spannung und Strom): Entitäten werden deaktiviert angelegt
+GDR_UNVERIFIED = frozenset(("1-0:1.4.0*255", "1-0:1.8.0*255"))
+
+
+class GdrDecodeError(ValueError):
+    """Frame ist kein gültiges Protobuf"""
+
+
+def _varint(buf, pos: int) -> tuple[int, int]:
+    result = 0
+    shift = 0
+    while True:
+        if pos >= len(buf):
+            raise GdrDecodeError("Varint über Frame-Ende hinaus")
+        byte = buf[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+        if shift >= 64:
+            raise GdrDecodeError("Varint zu lang")
+
+
+def iter_fields(buf):
+    """(Feldnummer, Wire-Typ, Wert) für jedes Feld einer Nachricht.
+
+    Wert ist int (varint), bytes (8 bzw. 4 Byte fix) oder memoryview (LEN).
+    """
+    buf = memoryview(buf)
+    pos = 0
+    end = len(buf)
+    while pos < end:
+        tag, pos = _varint(buf, pos)
+        number, wire = tag >> 3, tag & 7
+        if wire == WIRE_VARINT:
+            value, pos = _varint(buf, pos)
+        elif wire == WIRE_LEN:
+            length, pos = _varint(buf, pos)
+            if pos + length > end:
+                raise GdrDecodeError(f"Feld {number} länger als der Frame")
+            value = buf[pos : pos + length]
+            pos += length
+        elif wire == WIRE_I64:
+            value = bytes(buf[pos : pos + 8])
+            pos += 8
+        elif wire == WIRE_I32:
+            value = bytes(buf[pos : pos + 4])
+            pos += 4
+        else:
+            raise GdrDecodeError(f"Nicht unterstützter Wire-Typ {wire}")
+        if pos > end:
+            raise GdrDecodeError(f"Feld {number} über Frame-Ende hinaus")
+        yield number, wire, value
+
+
+def obis_from_int(value: int) -> str:
+    """Sechs Bytes A..F (höchstes zuerst) -> "A-B:C.D.E*F" """
+    a, b, c, d, e, f = value.to_bytes(6, "big")
+    return f"{a}-{b}:{c}.{d}.{e}*{f}"
+
+
+def _number(wire: int, value):
+    if wire == WIRE_I64:
+        return _DOUBLE.unpack(value)[0]
+    if wire == WIRE_I32:
+        return _FLOAT.unpack(value)[0]
+    if wire == WIRE_VARINT:
+        return value
+    raise GdrDecodeError("Zahl im LEN-Feld")
+
+
+def _map_entry(buf) -> tuple:
+    key = value = None
+    key_wire = value_wire = None
+    for number, wire, raw in iter_fields(buf):
+        if number == MAP_KEY:
+            key, key_wire = raw, wire
+        elif number == MAP_VALUE:
+            value, value_wire = raw, wire
+    if key_wire == WIRE_LEN:
+        key = bytes(key).decode("utf-8", "replace")
+    elif key_wire == WIRE_VARINT and key < 1 << 48:
+        key = obis_from_int(key)
+    return key, value, value_wire
+
+
+def _generic(buf):
+    """Unbekannte Untermeldung als {Feldnummer: Wert}, Text wenn möglich"""
+    result = {}
+    for number, wire, raw in iter_fields(buf):
+        if wire == WIRE_LEN:
+            try:
+                raw = bytes(raw).decode("utf-8")
+            except UnicodeDecodeError:
+                try:
+                    raw = _generic(raw)
+                except GdrDecodeError:
+                    raw = bytes(raw).hex()
+        elif wire != WIRE_VARINT:
+            raw = _number(wire, raw)
+        result[number] = raw
+    return result
+
+
+def _timestamp(wire: int, raw):
+    if wire == WIRE_LEN:
+        # google.protobuf.Timestamp
+        for number, field_wire, value in iter_fields(raw):
+            if number == TIMESTAMP_SECONDS and field_wire == WIRE_VARINT:
+                return value
+        return None
+    return _number(wire, raw)
+
+
+def decode_gdr(buf) -> dict:
+    """Eine GDR-Nachricht -> dict wie im Frontend (id, status, timestamp, ...)"""
+    gdr = {
+        "id": None,
+        "status": None,
+        "timestamp": None,
+        "values": {},
+        "flexValues": {},
+    }
+    for number, wire, raw in iter_fields(buf):
+        if number == GDR_ID and wire == WIRE_LEN:
+            gdr["id"] = bytes(raw).decode("utf-8", "replace")
+        elif number == GDR_STATUS and wire == WIRE_VARINT:
+            gdr["status"] = raw
+        elif number == GDR_TIMESTAMP:
+            gdr["timestamp"] = _timestamp(wire, raw)
+        elif number == GDR_VALUES and wire == WIRE_LEN:
+            key, value, value_wire = _map_entry(raw)
+            if key is not None and value is not None:
+                gdr["values"][key] = _number(value_wire, value)
+        elif number == GDR_FLEX_VALUES and wire == WIRE_LEN:
+            key, value, value_wire = _map_entry(raw)
+            if key is not None:
+                gdr["flexValues"][key] = (
+                    _generic(value) if value_wire == WIRE_LEN else value
+                )
+    return gdr
+
+
+def decode_gdrs(buf) -> dict:
+    """Ein GDRs-Frame -> {UUID: GDR}"""
+    gdrs = {}
+    for number, wire, raw in iter_fields(buf):
+        if number != GDRS_ENTRIES or wire != WIRE_LEN:
+            continue
+        key, value, value_wire = _map_entry(raw)
+        if value_wire != WIRE_LEN:
+            continue
+        gdr = decode_gdr(value)
+        gdrs[key or gdr["id"]] = gdr
+    return gdrs
@@ -0,0 +1,218 @@
+"""Gemeinsamer Verbindungszustand (Circuit Breaker) für einen KSEM-Host.
+
+REST, Modbus und WebSocket melden Erfolg und Transportfehler an denselben
+HostHealth, gezählt pro Transport (HTTP auf Port 80 für REST und WebSocket,
+Modbus TCP). Der Kreis öffnet, wenn ein Transport FAILURE_THRESHOLD Fehler in
+Folge hat und auch die übrigen zuletzt gescheitert sind; ein abgeschalteter
+Modbus-Port allein legt so nicht REST und WebSocket lahm. Bei offenem Kreis
+brechen alle Pfade sofort mit CircuitOpen ab, statt einzeln in Timeouts zu
+laufen. Nach Ablauf der Wartezeit prüft eine einzelne leichte Probe (TCP-
+Verbindungsaufbau) das Gerät; gelingt sie, schließt der Kreis für alle Pfade
+gemeinsam, sonst verdoppelt sich die Wartezeit.
+"""
+
+import asyncio
+import logging
+import random
+import time
+
+_LOGGER = logging.getLogger(__name__)
+
+# Transportfehler in Folge, ab denen der KSEM als offline gilt
+FAILURE_THRESHOLD = 3
+
+# Wartezeit bis zur ersten Probe und Obergrenze beim Verdoppeln (Sekunden)
+OPEN_INTERVAL = 10
+OPEN_INTERVAL_MAX = 300
+
+# Port und Timeout der Probe (Webserver des KSEM)
+PROBE_PORT = 80
+PROBE_TIMEOUT = 5
+
+# Transporte, deren Fehler getrennt gezählt werden
+TRANSPORT_HTTP = "http"
+TRANSPORT_MODBUS = "modbus"
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class CircuitOpen(ConnectionError):
+    """Der KSEM gilt als offline, der Request wurde nicht gesendet"""
+
+
+class HostHealth:
+    """Circuit Breaker für alle Verbindungen zu einem KSEM"""
+
+    def __init__(
+        self,
+        host: str,
+        failure_threshold: int = FAILURE_THRESHOLD,
+        open_interval: float = OPEN_INTERVAL,
+        open_interval_max: float = OPEN_INTERVAL_MAX,
+        probe_port: int = PROBE_PORT,
+        probe_timeout: float = PROBE_TIMEOUT,
+    ):
+        host, _, port = host.partition(":")
+        self.host = host
+        self._probe_port = int(port) if port else probe_port
+        self._probe_timeout = probe_timeout
+        self._failure_threshold = failure_threshold
+        self._open_interval = open_interval
+        self._open_interval_max = open_interval_max
+        self.state = STATE_CLOSED
+        # Transport -> Fehler in Folge (0 nach einem Erfolg)
+        self._failures: dict[str, int] = {}
+        self._current_interval = open_interval
+        self._opened_at = 0.0
+        self._last_error: str | None = None
+        self._probe_handle: asyncio.TimerHandle | None = None
+        self._probe_task: asyncio.Task | None = None
+        self._closed_event: asyncio.Event | None = None
+        self._listeners: list = []
+        self.stats = {
+            "opened": 0,
+            "closed": 0,
+            "probes": 0,
+            "probe_failures": 0,
+            "short_circuited": 0,
+        }
+
+    @property
+    def available(self) -> bool:
+        return self.state == STATE_CLOSED
+
+    def as_dict(self) -> dict:
+        return {
+            **self.stats,
+            "state": self.state,
+            "consecutive_failures": dict(self._failures),
+            "last_error": self._last_error,
+            "open_for": round(time.monotonic() - self._opened_at, 1)
+            if self.state != STATE_CLOSED
+            else None,
+        }
+
+    def add_listener(self, listener):
+        """listener(available: bool) bei jedem Öffnen und Schließen"""
+        self._listeners.append(listener)
+
+        def remove_listener():
+            self._listeners.remove(listener)
+
+        return remove_listener
+
+    def _notify(self):
+        available = self.available
+        for listener in list(self._listeners):
+            try:
+                listener(available)
+            except Exception:
+                _LOGGER.exception("Fehler im Health-Listener für %s", self.host)
+
+    def check(self):
+        """Vor jedem Request: wirft CircuitOpen, solange der Kreis offen ist"""
+        if self.state != STATE_CLOSED:
+            self.stats["short_circuited"] += 1
+            raise CircuitOpen(f"KSEM {self.host} nicht erreichbar: {self._last_error}")
+
+    def record_success(self, transport: str = TRANSPORT_HTTP):
+        self._failures[transport] = 0
+        if self.state != STATE_CLOSED:
+            self._close()
+
+    def record_failure(self, err: Exception, transport: str = TRANSPORT_HTTP):
+        """Transportfehler (keine Verbindung, Timeout), keine HTTP-Fehlercodes"""
+        self._last_error = f"{type(err).__name__}: {err}"
+        self._failures[transport] = self._failures.get(transport, 0) + 1
+        if (
+            self.state == STATE_CLOSED
+            and max(self._failures.values()) >= self._failure_threshold
+            # Offline erst, wenn auch die übrigen Transporte zuletzt scheiterten
+            and all(self._failures.values())
+        ):
+            self._open()
+
+    def _open(self):
+        self.state = STATE_OPEN
+        self._opened_at = time.monotonic()
+        self._current_interval = self._open_interval
+        self.stats["opened"] += 1
+        if self._closed_event is not None:
+            self._closed_event.clear()
+        _LOGGER.warning(
+            "KSEM %s nicht erreichbar (%s), pausiere alle Verbindungen",
+            self.host,
+            self._last_error,
+        )
+        self._schedule_probe()
+        self._notify()
+
+    def _close(self):
+        self.state = STATE_CLOSED
+        self._failures.clear()
+        self.stats["closed"] += 1
+        self._cancel_probe()
+        if self._closed_event is not None:
+            self._closed_event.set()
+        _LOGGER.info("KSEM %s wieder erreichbar", self.host)
+        self._notify()
+
+    def _schedule_probe(self):
+        self._cancel_probe()
+        delay = self._current_interval * random.uniform(0.8, 1.2)
+        self._probe_handle = asyncio.get_running_loop().call_later(
+            delay, self._start_probe
+        )
+
+    def _start_probe(self):
+        self._probe_handle = None
+        self.state = STATE_HALF_OPEN
+        self._probe_task = asyncio.get_running_loop().create_task(self._async_probe())
+
+    async def _async_probe(self):
+        self.stats["probes"] += 1
+        try:
+            _, writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self._probe_port),
+                self._probe_timeout,
+            )
+            writer.close()
+        except (OSError, asyncio.TimeoutError) as err:
+            self.stats["probe_failures"] += 1
+            self._last_error = f"{type(err).__name__}: {err}"
+            self.state = STATE_OPEN
+            self._current_interval = min(
+                self._current_interval * 2, self._open_interval_max
+            )
+            _LOGGER.debug(
+                "Probe zu %s fehlgeschlagen, nächster Versuch in ~%.0fs",
+                self.host,
+                self._current_interval,
+            )
+            self._schedule_probe()
+        else:
+            self._close()
+        finally:
+            self._probe_task = None
+
+    def _cancel_probe(self):
+        if self._probe_handle:
+            self._probe_handle.cancel()
+            self._probe_handle = None
+
+    async def async_wait_available(self):
+        """Wartet, bis der Kreis (wieder) geschlossen ist"""
+        if self.available:
+            return
+        if self._closed_event is None:
+            self._closed_event = asyncio.Event()
+        await self._closed_event.wait()
+
+    def shutdown(self):
+        self._cancel_probe()
+        if self._probe_task:
+            self._probe_task.cancel()
+            self._probe_task = None
+        self._listeners.clear()
@@ -0,0 +1,38 @@
+"""Eigene aiohttp-Session für die REST-API eines KSEM"""
+
+import aiohttp
+
+# Der KSEM-Webserver beantwortet nur wenige Requests gleichzeitig; mehr offene
+# Verbindungen bringen nichts, halten aber Ressourcen auf dem Gerät
+HTTP_POOL_SIZE = 3
+
+# Sekunden, die eine ungenutzte Verbindung für den nächsten Request offen bleibt.
+# Die Coordinators fragen alle paar Sekunden ab, die Verbindung bleibt also warm.
+HTTP_KEEPALIVE = 60
+
+# Sekunden, die eine DNS-Auflösung des Hostnamens wiederverwendet wird
+HTTP_DNS_CACHE = 300
+
+# Verbindungsaufbau, Lesen und gesamter Request dürfen nicht unbegrenzt hängen
+HTTP_TIMEOUT = aiohttp.ClientTimeout(total=30, connect=5, sock_read=20)
+
+
+def create_session(
+    pool_size: int = HTTP_POOL_SIZE,
+    keepalive: float = HTTP_KEEPALIVE,
+    dns_cache: int = HTTP_DNS_CACHE,
+    timeout: aiohttp.ClientTimeout = HTTP_TIMEOUT,
+) -> aiohttp.ClientSession:
+    """Session mit eigenem Verbindungspool, nur für einen KSEM-Host gedacht.
+
+    Muss innerhalb eines laufenden Event-Loops erzeugt und vom Besitzer mit
+    close() geschlossen werden.
+    """
+    connector = aiohttp.TCPConnector(
+        limit=pool_size,
+        limit_per_host=pool_size,
+        keepalive_timeout=keepalive,
+        ttl_dns_cache=dns_cache,
+        enable_cleanup_closed=True,
+    )
+    return aiohttp.ClientSession(connector=connector, timeout=timeout)
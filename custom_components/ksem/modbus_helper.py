@@ -1,244 +1,470 @@
+import asyncio
+import functools
+import inspect
 import logging
+import random
+import time
 from pymodbus.client import AsyncModbusTcpClient
+from pymodbus.exceptions import ConnectionException, ModbusIOException
+from .health import TRANSPORT_MODBUS
 from .modbus_map import SENSOR_DEFINITIONS
+from .modbus_pipeline import ModbusTcpPipeline, PipelineRejected
+from .modbus_plan import (
+    MAX_READ_REGISTERS,
+    POLL_INTERVALS,
+    READ_PLANS,
+    ReadPlan,
+    compile_read_plans,
+    default_enabled,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
-
-def group_register_blocks(sensor_defs, max_gap=2):
-    sorted_addresses = sorted(sensor_defs.keys())
-    blocks = []
-    block = []
-    last_end = None
-
-    for addr in sorted_addresses:
-        t = sensor_defs[addr]["type"]
-        if t in ("uint16", "int16"):
-            reg_size = 1
-        elif t in ("uint32", "int32"):
-            reg_size = 2
-        else:
-            reg_size = 4
-
-        if last_end is None or addr <= last_end + max_gap:
-            block.append((addr, reg_size))
-            last_end = addr + reg_size - 1
-        else:
-            blocks.append(block)
-            block = [(addr, reg_size)]
-            last_end = addr + reg_size - 1
-    if block:
-        blocks.append(block)
-
-    _LOGGER.debug("Gruppierte Modbus-Registerblöcke: %s", blocks)
-    return blocks
+# Reconnect-Backoff in Sekunden (exponentiell, mit Jitter)
+BACKOFF_BASE = 2
+BACKOFF_MAX = 300
+# Nach so vielen Sekunden ohne Verkehr wird die Verbindung mit einem Read geprüft
+KEEPALIVE_INTERVAL = 30
+# Pipelining-Zyklen in Folge mit Timeout, nach denen dauerhaft seriell gelesen
+# wird (Geräte, die parallele Requests stillschweigend verwerfen)
+PIPELINE_TIMEOUT_LIMIT = 3
+
+# Fehler, nach denen die Verbindung als tot gilt und neu aufgebaut wird
+TRANSPORT_ERRORS = (
+    ConnectionException,
+    ModbusIOException,
+    ConnectionError,
+    OSError,
+    asyncio.TimeoutError,
+)
+
+# Keyword für die Geräteadresse je pymodbus-Version. Wird einmalig beim
+# Verbinden anhand der Signatur von read_holding_registers bestimmt:
+#
+#   pymodbus 2.x        (address, count=1, **kwargs)             -> "unit"
+#   pymodbus 3.0 - 3.6  (address, count=1, slave=0, **kwargs)    -> "slave"
+#   pymodbus 3.7 - 3.9  (address, count=1, slave=1, ...)         -> "slave"
+#   pymodbus >= 3.10    (address, *, count=1, device_id=1, ...)  -> "device_id"
+#   unbekannt / nicht introspektierbar                           -> "slave"
+_UNIT_KEYWORDS = ("device_id", "slave", "unit")
+
+
+def detect_read_adapter(read_fn, unit_id: int):
+    """Liefert (Name, gebundener Aufruf) für read_holding_registers"""
+    try:
+        params = inspect.signature(read_fn).parameters
+    except (TypeError, ValueError):
+        params = {}
+    keyword = next((k for k in _UNIT_KEYWORDS if k in params), None)
+    if keyword is None:
+        has_kwargs = any(p.kind is p.VAR_KEYWORD for p in params.values())
+        # pymodbus 2.x nimmt "unit" über **kwargs entgegen
+        keyword = "unit" if has_kwargs else "slave"
+    return keyword, functools.partial(read_fn, **{keyword: unit_id})
 
 
 class KsemModbusClient:
-    def __init__(self, host: str, port: int = 502, unit_id: int = 1):
+    def __init__(
+        self,
+        host: str,
+        port: int = 502,
+        unit_id: int = 1,
+        sensor_defs: dict = SENSOR_DEFINITIONS,
+        max_registers: int = MAX_READ_REGISTERS,
+        pipelining: bool = False,
+        max_in_flight: int = 4,
+        poll_intervals: dict = POLL_INTERVALS,
+        keepalive_interval: float = KEEPALIVE_INTERVAL,
+        health=None,
+    ):
         self.host = host
+        # Optionaler gemeinsamer HostHealth (Circuit Breaker) mit REST/WebSocket
+        self.health = health
         self.port = port
         self.unit_id = unit_id
         self._client = None
+        # Opt-in: Blöcke parallel lesen, bei Problemen zurück auf seriell
+        self.pipelining = pipelining
+        self.max_in_flight = max_in_flight
+        self._pipeline = None
+        self._pipeline_timeouts = 0
+        self.keepalive_interval = keepalive_interval
+        self._failures = 0
+        self._retry_at = 0.0
+        self._last_io = 0.0
+        self._stats = {
+            "connects": 0,
+            "reconnects": 0,
+            "connect_failures": 0,
+            "transport_errors": 0,
+            "keepalive_probes": 0,
+        }
+        self.read_adapter: str | None = None
+        self._read_registers = None
+        self._sensor_defs = sensor_defs
+        self._max_registers = max_registers
+        self._poll_intervals = poll_intervals
+        # None = alle standardmäßig aktivierten Register, sonst nur die
+        # Adressen aktivierter Entitäten
+        self._enabled: set | None = None
+        self._plans: dict | None = None
+        self._next_due: dict[str, float] = {}
+        self._snapshot: dict = {}
+
+    def _build_plans(self) -> dict:
+        standard = self._enabled is None and self._sensor_defs is SENSOR_DEFINITIONS
+        if self._enabled is None:
+            defs = default_enabled(self._sensor_defs)
+        else:
+            defs = {a: s for a, s in self._sensor_defs.items() if a in self._enabled}
+        if standard and self._max_registers >= MAX_READ_REGISTERS:
+            plans = READ_PLANS
+        else:
+            plans = compile_read_plans(defs, max_registers=self._max_registers)
+        for poll, plan in plans.items():
+            _LOGGER.debug(
+                "Modbus-Leseplan %s für %s: %s", poll, self.host, plan.stats()
+            )
+
+        # Neu eingeplante Register sofort lesen, abgewählte aus dem Snapshot nehmen
+        slots = {
+            field.slot for plan in plans.values() for b in plan for field in b.fields
+        }
+        self._snapshot = {k: v for k, v in self._snapshot.items() if k in slots}
+        self._next_due.clear()
+        return plans
+
+    @property
+    def plans(self) -> dict:
+        """Lesepläne je Poll-Klasse (werden bei Bedarf neu erstellt)"""
+        if self._plans is None:
+            self._plans = self._build_plans()
+        return self._plans
+
+    @property
+    def plan(self) -> ReadPlan:
+        """Alle Requests eines vollständigen Polls (read_all)"""
+        return ReadPlan(b for plan in self.plans.values() for b in plan.blocks)
+
+    @property
+    def update_interval(self) -> float:
+        """Takt, in dem read_due aufgerufen werden sollte (schnellste Klasse)"""
+        polls = self.plans or self._poll_intervals
+        return min(self._poll_intervals[poll] for poll in polls)
+
+    def set_enabled_addresses(self, addresses=None):
+        """Beschränkt das Polling auf die angegebenen Register (None = alle
+        standardmäßig aktivierten)"""
+        self._enabled = None if addresses is None else set(addresses)
+        self._plans = None
+
+    def enable_address(self, address: int):
+        if self._enabled is not None and address not in self._enabled:
+            self._enabled.add(address)
+            self._plans = None
+
+    def disable_address(self, address: int):
+        if self._enabled is not None and address in self._enabled:
+            self._enabled.discard(address)
+            self._plans = None
+
+    @property
+    def connected(self) -> bool:
+        if self.pipelining:
+            return self._pipeline is not None and self._pipeline.connected
+        return self._client is not None and bool(self._client.connected)
+
+    @property
+    def connection_stats(self) -> dict:
+        """Zähler des Verbindungsmanagers (Reconnect-Stürme erkennen)"""
+        return {
+            **self._stats,
+            "connected": self.connected,
+            "consecutive_failures": self._failures,
+            "next_attempt_in": max(0.0, round(self._retry_at - time.monotonic(), 1)),
+        }
+
+    def _backoff(self) -> float:
+        """Exponentielles Backoff mit Jitter"""
+        delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (self._failures - 1))
+        return delay * random.uniform(0.5, 1.5)
+
+    async def _ensure_connected(self):
+        if self.health:
+            self.health.check()
+        if self.connected:
+            return
+        now = time.monotonic()
+        if now < self._retry_at:
+            raise ConnectionError(
+                f"Modbus {self.host}: nächster Verbindungsversuch in "
+                f"{self._retry_at - now:.0f}s"
+            )
+        had_connection = self._stats["connects"] > 0
+        try:
+            await self.connect()
+        except Exception as err:
+            if self.health:
+                self.health.record_failure(err, TRANSPORT_MODBUS)
+            self._failures += 1
+            self._stats["connect_failures"] += 1
+            self._retry_at = time.monotonic() + self._backoff()
+            await self._close_transports()
+            raise ConnectionError(
+                f"Modbus-Verbindung zu {self.host}:{self.port} fehlgeschlagen: {err}"
+            ) from err
+        self._failures = 0
+        self._retry_at = 0.0
+        self._stats["connects"] += 1
+        if had_connection:
+            self._stats["reconnects"] += 1
+        self._last_io = time.monotonic()
 
     async def connect(self):
+        if self.pipelining:
+            if self._pipeline is None:
+                self._pipeline = ModbusTcpPipeline(
+                    self.host, self.port, self.unit_id, window=self.max_in_flight
+                )
+            if not self._pipeline.connected:
+                await self._pipeline.connect()
+            return
+
         if not self._client:
             # old: self._client = AsyncModbusTcpClient(self.host, port=self.port)
-            # Client erzeugen (versionssicher)
+            # Client erzeugen (versionssicher); Reconnects übernimmt der
+            # Verbindungsmanager, daher reconnect_delay=0 und nur ein Retry
             try:
                 # Neuere pymodbus-Versionen akzeptieren unit_id direkt
                 self._client = AsyncModbusTcpClient(
-                    self.host, port=self.port, timeout=5, unit_id=self.unit_id
+                    self.host,
+                    port=self.port,
+                    timeout=5,
+                    retries=1,
+                    reconnect_delay=0,
+                    unit_id=self.unit_id,
                 )
             except TypeError:
                 # Ältere/andere Builds: ohne unit_id instanzieren und danach setzen
                 self._client = AsyncModbusTcpClient(
-                    self.host, port=self.port, timeout=5
+                    self.host,
+                    port=self.port,
+                    timeout=5,
+                    retries=1,
+                    reconnect_delay=0,
                 )
                 try:
                     setattr(self._client, "unit_id", self.unit_id)
                 except Exception:
                     pass
-            await self._client.connect()
-            _LOGGER.debug(
-                "Modbus TCP verbunden mit %s:%s (Unit %s)",
-                self.host,
-                self.port,
-                self.unit_id,
-            )
-
-    async def disconnect(self):
+        if not await self._client.connect():
+            raise ConnectionError("pymodbus connect() fehlgeschlagen")
+        self.read_adapter, self._read_registers = detect_read_adapter(
+            self._client.read_holding_registers, self.unit_id
+        )
+        _LOGGER.debug(
+            "Modbus TCP verbunden mit %s:%s (Unit %s, Adapter %s)",
+            self.host,
+            self.port,
+            self.unit_id,
+            self.read_adapter,
+        )
+
+    async def _close_transports(self):
         if self._client:
-            await self._client.close()
+            result = self._client.close()  # ab pymodbus 3 synchron
+            if inspect.isawaitable(result):
+                await result
             self._client = None
-            self._protocol = None
-            _LOGGER.debug("Modbus TCP Verbindung getrennt")
+        if self._pipeline:
+            await self._pipeline.close()
+            self._pipeline = None
+
+    async def _drop_connection(self, err: Exception):
+        """Transportfehler: Verbindung verwerfen, nächster Poll verbindet neu"""
+        self._stats["transport_errors"] += 1
+        if self.health:
+            self.health.record_failure(err, TRANSPORT_MODBUS)
+        self._failures += 1
+        self._retry_at = time.monotonic() + self._backoff()
+        _LOGGER.warning("Modbus-Verbindung zu %s verloren: %s", self.host, err)
+        await self._close_transports()
 
-    async def read_all(self):
-        if not self._client:
-            await self.connect()
-
-        def _decode_fallback(raw_regs, dtype: str, word_order: str = "big"):
-            """Einfacher Decoder für häufige Typen, falls convert_from_registers nicht vorhanden ist."""
-            # Modbus-Word-Order: "big" = high word zuerst (KSEM nutzt Big Endian laut Doku)
-            words = list(raw_regs)
-            if word_order.lower() != "big":
-                words = list(reversed(words))
-
-            def _u16(w0):
-                return w0 & 0xFFFF
-
-            def _s16(w0):
-                v = w0 & 0xFFFF
-                return v - 0x10000 if v & 0x8000 else v
-
-            def _u32(w0, w1):
-                return ((w0 & 0xFFFF) << 16) | (w1 & 0xFFFF)
-
-            def _s32(w0, w1):
-                u = _u32(w0, w1)
-                return u - 0x1_0000_0000 if u & 0x8000_0000 else u
-
-            def _u64(w0, w1, w2, w3):
-                return (
-                    ((w0 & 0xFFFF) << 48)
-                    | ((w1 & 0xFFFF) << 32)
-                    | ((w2 & 0xFFFF) << 16)
-                    | (w3 & 0xFFFF)
+    async def disconnect(self):
+        await self._close_transports()
+        self._retry_at = 0.0
+        _LOGGER.debug("Modbus TCP Verbindung getrennt")
+
+    async def _read_block(self, block):
+        """Liest einen Block seriell über pymodbus, None bei Modbus-Fehlern"""
+        start = block.start
+        total_words = block.count
+        try:
+            result = await self._read_registers(address=start, count=total_words)
+        except TRANSPORT_ERRORS:
+            raise
+        except Exception as e:
+            _LOGGER.exception(
+                "Fehler beim Modbus-Blocklesen (Start=0x%04X, Words=%s): %s",
+                start,
+                total_words,
+                e,
+            )
+            return None
+
+        # ---------- Ergebnis prüfen ----------
+        if result is None or getattr(result, "isError", lambda: False)():
+            _LOGGER.warning(
+                "Modbus-Fehler beim Lesen von %s-%s: %s",
+                start,
+                start + total_words,
+                result,
+            )
+            return None
+
+        return getattr(result, "registers", None)
+
+    async def _read_pipelined(self, blocks):
+        """Liest alle Blöcke parallel, None wenn das Gerät das nicht mitmacht.
+
+        Eine Ablehnung (PipelineRejected) oder PIPELINE_TIMEOUT_LIMIT Zyklen
+        mit Timeout in Folge schalten dauerhaft auf seriell. Andere
+        Transportfehler und einzelne Timeouts verwerfen die Verbindung wie
+        beim seriellen Lesen, der nächste Zyklus versucht es wieder mit
+        Pipelining.
+        """
+        try:
+            results = await self._pipeline.read_blocks(blocks)
+        except TRANSPORT_ERRORS as err:
+            if isinstance(err, asyncio.TimeoutError):
+                self._pipeline_timeouts += 1
+            await self._drop_connection(err)
+            if self._pipeline_timeouts >= PIPELINE_TIMEOUT_LIMIT:
+                _LOGGER.warning(
+                    "Modbus-Pipelining mit %s: %s Timeouts in Folge, wechsle "
+                    "auf seriell",
+                    self.host,
+                    self._pipeline_timeouts,
                 )
-
-            dtype = dtype.upper()
-            n = len(words)
-
-            if dtype in ("UINT16", "U16") and n >= 1:
-                return _u16(words[0])
-            if dtype in ("INT16", "S16") and n >= 1:
-                return _s16(words[0])
-
-            if dtype in ("UINT32", "U32") and n >= 2:
-                return _u32(words[0], words[1])
-            if dtype in ("INT32", "S32") and n >= 2:
-                return _s32(words[0], words[1])
-
-            if dtype in ("UINT64", "U64") and n >= 4:
-                return _u64(words[0], words[1], words[2], words[3])
-
-            # Float/andere Typen kannst du bei Bedarf ergänzen.
-            raise ValueError(
-                f"Fallback-Decoder: Unsupported dtype '{dtype}' with {n} regs"
+                self.pipelining = False
+            raise ConnectionError(f"Modbus-Transportfehler: {err}") from err
+        except PipelineRejected as err:
+            _LOGGER.warning(
+                "Modbus-Pipelining mit %s fehlgeschlagen (%s), wechsle auf seriell",
+                self.host,
+                err,
             )
+            await self._close_transports()
+            self.pipelining = False
+            return None
+        self._pipeline_timeouts = 0
+
+        responses = []
+        for block, result in zip(blocks, results):
+            if isinstance(result, Exception):
+                _LOGGER.warning(
+                    "Modbus-Fehler beim Lesen von %s-%s: %s",
+                    block.start,
+                    block.end,
+                    result,
+                )
+                result = None
+            responses.append(result)
+        return responses
+
+    async def _fetch(self, blocks) -> list:
+        await self._ensure_connected()
+        responses = None
+        if self.pipelining:
+            responses = await self._read_pipelined(blocks)
+            if responses is None:
+                await self._ensure_connected()
+        if responses is None:
+            responses = []
+            try:
+                for block in blocks:
+                    responses.append(await self._read_block(block))
+            except TRANSPORT_ERRORS as err:
+                await self._drop_connection(err)
+                raise ConnectionError(f"Modbus-Transportfehler: {err}") from err
+        self._last_io = time.monotonic()
+        if self.health:
+            self.health.record_success(TRANSPORT_MODBUS)
+        return responses
+
+    async def _keepalive(self):
+        """Leerlauf-Probe: ein Register lesen, um halboffene Verbindungen zu finden"""
+        blocks = [b for plan in self.plans.values() for b in plan.blocks]
+        if not blocks:
+            return
+        self._stats["keepalive_probes"] += 1
+        await self._fetch(blocks[:1])
+
+    async def _read_blocks(self, blocks) -> dict:
+        responses = await self._fetch(blocks)
 
         data = {}
-        blocks = group_register_blocks(SENSOR_DEFINITIONS)
-
-        for block in blocks:
-            start = block[0][0]
-            total_words = sum(size for _, size in block)
+        for block, registers in zip(blocks, responses):
+            if registers is None:
+                continue
+            if len(registers) < block.count:
+                _LOGGER.warning(
+                    "Zu wenig Register erhalten (%s/%s) für Block %s-%s",
+                    len(registers),
+                    block.count,
+                    block.start,
+                    block.end,
+                )
+                continue
 
+            # ---------- Entpacken / Konvertieren ----------
             try:
-                # ---------- PyModbus 2/3/4-kompatibler Read ----------
-                try:
-                    result = await self._client.read_holding_registers(
-                        address=start, count=total_words, unit=self.unit_id
-                    )
-                except TypeError:
-                    try:
-                        result = await self._client.read_holding_registers(
-                            address=start, count=total_words, slave=self.unit_id
-                        )
-                    except TypeError:
-                        try:
-                            result = await self._client.read_holding_registers(
-                                address=start, count=total_words
-                            )  # nutzt evtl. client.unit_id
-                        except TypeError:
-                            try:
-                                result = await self._client.read_holding_registers(
-                                    start, total_words
-                                )  # positionsbasiert
-                            except TypeError:
-                                result = await self._client.read_holding_registers(
-                                    start
-                                )  # letzter Fallback
-
-                # ---------- Ergebnis prüfen ----------
-                if result is None or getattr(result, "isError", lambda: False)():
-                    _LOGGER.warning(
-                        "Modbus-Fehler beim Lesen von %s-%s: %s",
-                        start,
-                        start + total_words,
-                        result,
-                    )
-                    continue
-
-                registers = getattr(result, "registers", None)
-                if not registers or len(registers) < total_words:
-                    _LOGGER.warning(
-                        "Zu wenig Register erhalten (%s/%s) für Block %s-%s",
-                        0 if not registers else len(registers),
-                        total_words,
-                        start,
-                        start + total_words,
-                    )
-                    continue
-
-                # ---------- Entpacken / Konvertieren ----------
-                offset = 0
-                for addr, size in block:
-                    spec = SENSOR_DEFINITIONS[addr]
-                    raw_regs = registers[offset : offset + size]
-
-                    try:
-                        # Versuch 1: dein bisheriger Weg über DATATYPE/convert_from_registers
-                        datatype_name = spec["type"].upper()
-                        datatype_enum = getattr(
-                            getattr(self._client, "DATATYPE", None), datatype_name, None
-                        )
-                        if datatype_enum is not None and hasattr(
-                            self._client, "convert_from_registers"
-                        ):
-                            val = self._client.convert_from_registers(
-                                raw_regs,
-                                data_type=datatype_enum,
-                                # byteorder="big",  # bei Bedarf aktivieren
-                                word_order="big",
-                            )
-                        else:
-                            # Versuch 2: Fallback-Decoder (unterstützt die gängigen Integer-Typen)
-                            val = _decode_fallback(
-                                raw_regs, datatype_name, word_order="big"
-                            )
-
-                    except Exception as err:
-                        _LOGGER.warning(
-                            "Fehler beim Konvertieren von %s (Addr %s / %s Regs): %s",
-                            spec.get("name", addr),
-                            addr,
-                            size,
-                            err,
-                        )
-                        offset += size
-                        continue
-
-                    scaled_val = val * spec.get("scale", 1)
-                    _LOGGER.debug(
-                        "%s (%s): %s → skaliert: %s %s",
-                        spec.get("name", addr),
-                        addr,
-                        val,
-                        scaled_val,
-                        spec.get("unit", ""),
-                    )
-                    data[spec["name"]] = scaled_val
-                    offset += size
-
-            except Exception as e:
-                _LOGGER.exception(
-                    "Fehler beim Modbus-Blocklesen (Start=0x%04X, Words=%s): %s",
-                    start,
-                    total_words,
-                    e,
+                data.update(block.decode(registers))
+            except Exception as err:
+                _LOGGER.warning(
+                    "Fehler beim Konvertieren von Block %s-%s (%s): %s",
+                    block.start,
+                    block.end,
+                    ", ".join(field.slot for field in block.fields),
+                    err,
                 )
-
-        _LOGGER.debug("Alle OBIS-Daten gelesen: %s", data)
         return data
+
+    async def read_due(self, now: float | None = None) -> dict:
+        """Liest nur die fälligen Poll-Klassen und liefert den Gesamtstand"""
+        if now is None:
+            now = time.monotonic()
+        # Etwas Spielraum, damit leicht verfrühte Ticks nicht einen Takt verlieren
+        slack = self.update_interval / 4
+        blocks = []
+        next_due = {}
+        for poll, plan in self.plans.items():
+            due = self._next_due.get(poll)
+            if due is not None and due > now + slack:
+                continue
+            interval = self._poll_intervals[poll]
+            if due is None or due + interval <= now:
+                # Erster Lauf oder zu weit hinterher: neu ab jetzt takten
+                next_due[poll] = now + interval
+            else:
+                next_due[poll] = due + interval
+            blocks.extend(plan.blocks)
+
+        if blocks:
+            self._snapshot.update(await self._read_blocks(blocks))
+            # Erst nach erfolgreichem Lesen weiterschalten, sonst bleibt eine
+            # Klasse nach einem Fehler bis zum nächsten Takt ohne Werte
+            self._next_due.update(next_due)
+        elif self.connected and now - self._last_io > self.keepalive_interval:
+            await self._keepalive()
+        _LOGGER.debug("Modbus-Snapshot aktualisiert (%s Blöcke)", len(blocks))
+        return dict(self._snapshot)
+
+    async def read_all(self) -> dict:
+        """Liest sofort alle Poll-Klassen"""
+        now = time.monotonic()
+        self._snapshot.update(await self._read_blocks(self.plan.blocks))
+        for poll in self.plans:
+            self._next_due[poll] = now + self._poll_intervals[poll]
+        _LOGGER.debug("Alle OBIS-Daten gelesen: %s", self._snapshot)
+        return dict(self._snapshot)
@@ -1,3 +1,27 @@
+"""Modbus-Registertabelle des KSEM.
+
+Optionaler Schlüssel "poll": "fast" | "normal" | "slow" legt fest, wie oft ein
+Register gelesen wird (siehe modbus_plan.POLL_INTERVALS), Standard ist "normal".
+
+Optionale Schlüssel "deadband" (absolut, in der skalierten Einheit) und
+"deadband_rel" (Anteil vom letzten Wert) legen fest, ab welcher Änderung die
+Entität neu geschrieben wird. Ohne Angabe gilt DEFAULT_DEADBANDS je Einheit.
+
+"enabled_default": False legt die Entität deaktiviert an; deaktivierte
+Entitäten melden ihr Register nicht an, es wird dann auch nicht gepollt.
+"""
+
+# Standard-Totband je Einheit; nicht aufgeführte Einheiten melden jede Änderung
+DEFAULT_DEADBANDS = {
+    "W": 1,
+    "var": 1,
+    "VA": 1,
+    "V": 0.1,
+    "A": 0.01,
+    "Hz": 0.01,
+    "unitless": 0.001,
+}
+
 SENSOR_DEFINITIONS = {
     0: {
         "name": "Active Power+",
@@ -5,6 +29,7 @@ SENSOR_DEFINITIONS = {
         "unit": "W",
         "scale": 0.1,
         "type": "uint32",
+        "poll": "fast",
         "device_class": "power",
         "state_class": "measurement",
         "device": "smartmeter",
@@ -15,6 +40,7 @@ SENSOR_DEFINITIONS = {
         "unit": "W",
         "scale": 0.1,
         "type": "uint32",
+        "poll": "fast",
         "device_class": "power",
         "state_class": "measurement",
         "device": "smartmeter",
@@ -309,6 +335,7 @@ SENSOR_DEFINITIONS = {
         "unit": "Wh",
         "scale": 0.1,
         "type": "uint64",
+        "poll": "slow",
         "device_class": "energy",
         "state_class": "total_increasing",
         "device": "smartmeter",
@@ -319,6 +346,7 @@ SENSOR_DEFINITIONS = {
         "unit": "Wh",
         "scale": 0.1,
         "type": "uint64",
+        "poll": "slow",
         "device_class": "energy",
         "state_class": "total_increasing",
         "device": "smartmeter",
@@ -329,6 +357,7 @@ SENSOR_DEFINITIONS = {
         "unit": "varh",
         "scale": 0.1,
         "type": "uint64",
+        "poll": "slow",
         "device": "smartmeter",
     },
     524: {
@@ -337,6 +366,7 @@ SENSOR_DEFINITIONS = {
         "unit": "varh",
         "scale": 0.1,
         "type": "uint64",
+        "poll": "slow",
         "device": "smartmeter",
     },
     544: {
@@ -345,6 +375,7 @@ SENSOR_DEFINITIONS = {
         "unit": "VAh",
         "scale": 0.1,
         "type": "uint64",
+        "poll": "slow",
         "device": "smartmeter",
     },
     548: {
@@ -353,6 +384,7 @@ SENSOR_DEFINITIONS = {
         "unit": "VAh",
         "scale": 0.1,
         "type": "uint64",
+        "poll": "slow",
         "device": "smartmeter",
     },
     592: {
@@ -361,6 +393,7 @@ SENSOR_DEFINITIONS = {
         "unit": "Wh",
         "scale": 0.1,
         "type": "uint64",
+        "poll": "slow",
         "device": "smartmeter",
     },
     596: {
@@ -369,6 +402,7 @@ SENSOR_DEFINITIONS = {
         "unit": "Wh",
         "scale": 0.1,
         "type": "uint64",
+        "poll": "slow",
         "device": "smartmeter",
     },
     600: {
@@ -377,6 +411,7 @@ SENSOR_DEFINITIONS = {
         "unit": "varh",
         "scale": 0.1,
         "type": "uint64",
+        "poll": "slow",
         "device": "smartmeter",
     },
     604: {
@@ -385,6 +420,7 @@ SENSOR_DEFINITIONS = {
         "unit": "varh",
         "scale": 0.1,
         "type": "uint64",
+        "poll": "slow",
         "device": "smartmeter",
     },
     624: {
@@ -393,6 +429,7 @@ SENSOR_DEFINITIONS = {
         "unit": "VAh",
         "scale": 0.1,
         "type": "uint64",
+        "poll": "slow",
         "device": "smartmeter",
     },
     628: {
@@ -401,6 +438,7 @@ SENSOR_DEFINITIONS = {
         "unit": "VAh",
         "scale": 0.1,
         "type": "uint64",
+        "poll": "slow",
         "device": "smartmeter",
     },
     672: {
@@ -409,6 +447,7 @@ SENSOR_DEFINITIONS = {
         "unit": "Wh",
         "scale": 0.1,
         "type": "uint64",
+        "poll": "slow",
         "device": "smartmeter",
     },
     676: {
@@ -417,6 +456,7 @@ SENSOR_DEFINITIONS = {
         "unit": "Wh",
         "scale": 0.1,
         "type": "uint64",
+        "poll": "slow",
         "device": "smartmeter",
     },
     680: {
@@ -425,6 +465,7 @@ SENSOR_DEFINITIONS = {
         "unit": "varh",
         "scale": 0.1,
         "type": "uint64",
+        "poll": "slow",
         "device": "smartmeter",
     },
     684: {
@@ -433,6 +474,7 @@ SENSOR_DEFINITIONS = {
         "unit": "varh",
         "scale": 0.1,
         "type": "uint64",
+        "poll": "slow",
         "device": "smartmeter",
     },
     704: {
@@ -441,6 +483,7 @@ SENSOR_DEFINITIONS = {
         "unit": "VAh",
         "scale": 0.1,
         "type": "uint64",
+        "poll": "slow",
         "device": "smartmeter",
     },
     708: {
@@ -449,6 +492,7 @@ SENSOR_DEFINITIONS = {
         "unit": "VAh",
         "scale": 0.1,
         "type": "uint64",
+        "poll": "slow",
         "device": "smartmeter",
     },
     752: {
@@ -457,6 +501,7 @@ SENSOR_DEFINITIONS = {
         "unit": "Wh",
         "scale": 0.1,
         "type": "uint64",
+        "poll": "slow",
         "device": "smartmeter",
     },
     756: {
@@ -465,6 +510,7 @@ SENSOR_DEFINITIONS = {
         "unit": "Wh",
         "scale": 0.1,
         "type": "uint64",
+        "poll": "slow",
         "device": "smartmeter",
     },
     760: {
@@ -473,6 +519,7 @@ SENSOR_DEFINITIONS = {
         "unit": "varh",
         "scale": 0.1,
         "type": "uint64",
+        "poll": "slow",
         "device": "smartmeter",
     },
     764: {
@@ -481,6 +528,7 @@ SENSOR_DEFINITIONS = {
         "unit": "varh",
         "scale": 0.1,
         "type": "uint64",
+        "poll": "slow",
         "device": "smartmeter",
     },
     784: {
@@ -489,6 +537,7 @@ SENSOR_DEFINITIONS = {
         "unit": "VAh",
         "scale": 0.1,
         "type": "uint64",
+        "poll": "slow",
         "device": "smartmeter",
     },
     788: {
@@ -497,14 +546,18 @@ SENSOR_DEFINITIONS = {
         "unit": "VAh",
         "scale": 0.1,
         "type": "uint64",
+        "poll": "slow",
         "device": "smartmeter",
     },
+    # Wallbox-Werte kommen per Push (GDR- bzw. evse/+/state-WebSocket), die
+    # Register werden nur gepollt, wenn die Entität aktiviert wird
     49206: {
         "name": "Enector_status",
         "unit": "",
         "scale": 1,
         "type": "uint64",
         "device": "wallbox",
+        "enabled_default": False,
         "device_class": "enum",
         "state_class": None,
         "map": {
@@ -526,28 +579,34 @@ SENSOR_DEFINITIONS = {
         "device_class": "current",
         "state_class": "measurement",
         "device": "wallbox",
+        "enabled_default": False,
     },
     49246: {
         "name": "Enector_Ladeleistung",
         "unit": "W",
         "scale": 0.001,
         "type": "uint64",
+        "poll": "fast",
         "device_class": "power",
         "state_class": "measurement",
         "device": "wallbox",
+        "enabled_default": False,
     },
     49254: {
         "name": "Enector_geladene_Energie",
         "unit": "Wh",
         "scale": 0.001,
         "type": "uint64",
+        "poll": "slow",
         "device_class": "energy",
         "state_class": "total_increasing",
         "device": "wallbox",
+        "enabled_default": False,
     },
     40972: {
         "name": "Grid power Total",
         "type": "int32",
+        "poll": "fast",
         "unit": "W",
         "device_class": "power",
         "device": "smartmeter",
@@ -555,6 +614,7 @@ SENSOR_DEFINITIONS = {
     40974: {
         "name": "Sum output inverter AC",
         "type": "int32",
+        "poll": "fast",
         "unit": "W",
         "device_class": "power",
         "device": "smartmeter",
@@ -562,6 +622,7 @@ SENSOR_DEFINITIONS = {
     40976: {
         "name": "Sum pv power inverter DC",
         "type": "int32",
+        "poll": "fast",
         "unit": "W",
         "device_class": "power",
         "device": "smartmeter",
@@ -569,6 +630,7 @@ SENSOR_DEFINITIONS = {
     40982: {
         "name": "Home consumption",
         "type": "int32",
+        "poll": "fast",
         "unit": "W",
         "device_class": "power",
         "device": "smartmeter",
@@ -576,6 +638,7 @@ SENSOR_DEFINITIONS = {
     40984: {
         "name": "Sum battery charge/discharge DC",
         "type": "int32",
+        "poll": "fast",
         "unit": "W",
         "device_class": "power",
         "device": "smartmeter",
@@ -617,6 +680,7 @@ SENSOR_DEFINITIONS = {
     40996: {
         "name": "Sum wallbox charge power total",
         "type": "uint32",
+        "poll": "fast",
         "unit": "W",
         "device_class": "power",
         "device": "smartmeter",
@@ -0,0 +1,163 @@
+"""Pipelined Modbus-TCP-Reads über eine einzelne Verbindung"""
+
+import asyncio
+import logging
+import struct
+
+_LOGGER = logging.getLogger(__name__)
+
+_MBAP = struct.Struct(">HHHB")
+_READ_REQUEST = struct.Struct(">HHHBBHH")
+_FC_READ_HOLDING = 0x03
+
+
+class PipelineRejected(Exception):
+    """Gerät verarbeitet parallele Transaktionen nicht korrekt"""
+
+
+class ModbusExceptionResponse(Exception):
+    """Gerät hat mit einer Modbus-Exception geantwortet"""
+
+    def __init__(self, code: int):
+        super().__init__(f"Modbus-Exception {code}")
+        self.code = code
+
+
+class ModbusTcpPipeline:
+    """Schickt mehrere Read-Holding-Registers-Requests gleichzeitig.
+
+    pymodbus serialisiert Requests über einen internen Lock, deshalb spricht
+    die Pipeline das MBAP-Protokoll selbst: jeder Request bekommt eine eigene
+    Transaction-ID, Antworten werden über die ID ihrem Request zugeordnet.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int = 502,
+        unit_id: int = 1,
+        window: int = 4,
+        timeout: float = 5,
+    ):
+        self.host = host
+        self.port = port
+        self.unit_id = unit_id
+        self.timeout = timeout
+        self._window = asyncio.Semaphore(max(1, window))
+        self._reader = None
+        self._writer = None
+        self._reader_task = None
+        self._pending: dict[int, asyncio.Future] = {}
+        # Transaction-IDs, auf die nach einem Timeout noch eine Antwort kommen darf
+        self._expired: set[int] = set()
+        self._tid = 0
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None and not self._writer.is_closing()
+
+    async def connect(self):
+        self._reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), self.timeout
+        )
+        self._expired.clear()
+        self._reader_task = asyncio.create_task(self._read_responses())
+        _LOGGER.debug("Modbus-Pipeline verbunden mit %s:%s", self.host, self.port)
+
+    async def close(self):
+        if self._reader_task:
+            self._reader_task.cancel()
+            self._reader_task = None
+        if self._writer:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except Exception:
+                pass
+            self._writer = None
+        self._fail_pending(ConnectionError("Pipeline geschlossen"))
+
+    def _fail_pending(self, err: Exception):
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(err)
+        self._pending.clear()
+
+    async def _read_responses(self):
+        try:
+            while True:
+                header = await self._reader.readexactly(_MBAP.size)
+                tid, _, length, _ = _MBAP.unpack(header)
+                pdu = await self._reader.readexactly(length - 1)
+                future = self._pending.pop(tid, None)
+                if future is None and tid in self._expired:
+                    # Verspätete Antwort auf einen abgelaufenen Request
+                    self._expired.discard(tid)
+                    continue
+                if future is None:
+                    # Antwort ohne passenden Request: Gerät mischt Transaktionen
+                    raise PipelineRejected(f"Unerwartete Transaction-ID {tid}")
+                if not future.done():
+                    future.set_result(pdu)
+        except asyncio.CancelledError:
+            raise
+        except Exception as err:
+            self._fail_pending(
+                err if isinstance(err, PipelineRejected) else ConnectionError(err)
+            )
+            if self._writer:
+                self._writer.close()
+                self._writer = None
+
+    async def read_holding_registers(self, address: int, count: int) -> list[int]:
+        async with self._window:
+            if not self.connected:
+                raise ConnectionError("Pipeline nicht verbunden")
+            self._tid = (self._tid + 1) & 0xFFFF
+            tid = self._tid
+            future = asyncio.get_running_loop().create_future()
+            self._pending[tid] = future
+            self._writer.write(
+                _READ_REQUEST.pack(
+                    tid, 0, 6, self.unit_id, _FC_READ_HOLDING, address, count
+                )
+            )
+            try:
+                pdu = await asyncio.wait_for(future, self.timeout)
+            except asyncio.TimeoutError as err:
+                # Meist ein verlorenes Paket: Transportfehler, kein Zeichen,
+                # dass das Gerät keine parallelen Transaktionen kann
+                self._pending.pop(tid, None)
+                self._expired.add(tid)
+                raise asyncio.TimeoutError(
+                    f"Keine Antwort auf Transaction {tid} ({address}/{count})"
+                ) from err
+
+        if pdu[0] & 0x80:
+            raise ModbusExceptionResponse(pdu[1])
+        byte_count = pdu[1]
+        if pdu[0] != _FC_READ_HOLDING or byte_count != count * 2:
+            raise PipelineRejected(
+                f"Antwort passt nicht zu Request {address}/{count}: {pdu[:2].hex()}"
+            )
+        return list(struct.unpack_from(f">{count}H", pdu, 2))
+
+    async def read_blocks(self, blocks) -> list:
+        """Liest alle Blöcke parallel; Modbus-Exceptions kommen pro Block zurück.
+
+        Zuordnungsfehler werfen PipelineRejected, Transportfehler und Timeouts
+        ConnectionError, OSError bzw. asyncio.TimeoutError.
+        """
+        if not self.connected:
+            await self.connect()
+        results = await asyncio.gather(
+            *(self.read_holding_registers(b.start, b.count) for b in blocks),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(
+                result,
+                (PipelineRejected, ConnectionError, OSError, asyncio.TimeoutError),
+            ):
+                raise result
+        return results
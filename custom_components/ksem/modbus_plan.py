@@ -0,0 +1,373 @@
+"""Vorkompilierter Modbus-Leseplan für KSEM"""
+
+import logging
+from dataclasses import dataclass
+from operator import mul
+from struct import Struct
+
+from .modbus_map import DEFAULT_DEADBANDS, SENSOR_DEFINITIONS
+
+_LOGGER = logging.getLogger(__name__)
+
+# Registeranzahl je Datentyp (1 Register = 16 Bit)
+REGISTER_SIZES = {
+    "uint16": 1,
+    "int16": 1,
+    "uint32": 2,
+    "int32": 2,
+    "uint64": 4,
+    "float32": 2,
+}
+
+# Maximale Registeranzahl pro Read Holding Registers (Modbus-Spezifikation)
+MAX_READ_REGISTERS = 125
+
+# Ein zusätzlicher Request kostet so viel wie das Mitlesen von 32 ungenutzten
+# Registern (MBAP-Header, TCP-Overhead und vor allem ein Netzwerk-Roundtrip)
+REQUEST_COST = 32
+
+# Poll-Klassen der Registertabelle und ihre Intervalle in Sekunden
+POLL_INTERVALS = {
+    "fast": 1,
+    "normal": 10,
+    "slow": 60,
+}
+DEFAULT_POLL = "normal"
+
+# struct-Formatzeichen je Datentyp, Big Endian / High Word zuerst (laut KSEM-Doku)
+STRUCT_CODES = {
+    "uint16": "H",
+    "int16": "h",
+    "uint32": "I",
+    "int32": "i",
+    "uint64": "Q",
+    "float32": "f",
+}
+
+
+def _field_layout(spec) -> tuple[int, str]:
+    """Registeranzahl und struct-Formatzeichen eines Map-Eintrags"""
+    dtype = spec["type"].lower()
+    if dtype == "string":
+        # Strings belegen "length" Register, je Register zwei Zeichen
+        size = spec["length"]
+        return size, f"{size * 2}s"
+    if dtype not in STRUCT_CODES:
+        raise ValueError(f"Unbekannter Datentyp '{dtype}'")
+    return REGISTER_SIZES[dtype], STRUCT_CODES[dtype]
+
+
+@dataclass(frozen=True)
+class PlanField:
+    """Ein Wert innerhalb eines Registerblocks"""
+
+    address: int
+    slot: str
+    offset: int
+    size: int
+    dtype: str
+    code: str
+    scale: float
+
+
+class PlanBlock:
+    """Ein einzelner read_holding_registers-Request samt Decoder"""
+
+    __slots__ = (
+        "start",
+        "count",
+        "fields",
+        "_words",
+        "_layout",
+        "_slots",
+        "_scales",
+        "_strings",
+    )
+
+    def __init__(self, start: int, count: int, fields: tuple):
+        self.start = start
+        self.count = count
+        self.fields = fields
+        # Register -> Bytes und Bytes -> Werte jeweils mit einem vorkompilierten Struct
+        self._words = Struct(f">{count}H")
+        layout = ">"
+        pos = 0
+        for field in fields:
+            layout += "x" * ((field.offset - pos) * 2) + field.code
+            pos = field.offset + field.size
+        layout += "x" * ((count - pos) * 2)
+        self._layout = Struct(layout)
+        self._slots = tuple(field.slot for field in fields)
+        self._scales = tuple(field.scale for field in fields)
+        self._strings = tuple(f.slot for f in fields if f.dtype == "string")
+
+    @property
+    def end(self) -> int:
+        return self.start + self.count - 1
+
+    def decode(self, registers) -> dict:
+        """Entpackt alle Felder des Blocks in einem Durchgang"""
+        raw = self._words.pack(*registers[: self.count])
+        values = map(mul, self._layout.unpack(raw), self._scales)
+        data = dict(zip(self._slots, values))
+        for slot in self._strings:
+            data[slot] = data[slot].rstrip(b"\x00").decode("ascii", "replace")
+        return data
+
+    def __repr__(self):
+        return f"<PlanBlock start={self.start} count={self.count}>"
+
+
+class ReadPlan:
+    """Fertig gruppierte Registerblöcke für einen kompletten Poll"""
+
+    def __init__(self, blocks):
+        self.blocks = tuple(blocks)
+
+    def __iter__(self):
+        return iter(self.blocks)
+
+    def __len__(self):
+        return len(self.blocks)
+
+    @property
+    def request_count(self) -> int:
+        return len(self.blocks)
+
+    @property
+    def register_count(self) -> int:
+        return sum(block.count for block in self.blocks)
+
+    @property
+    def field_count(self) -> int:
+        return sum(len(block.fields) for block in self.blocks)
+
+    @property
+    def wasted_registers(self) -> int:
+        """Mitgelesene Register, die keinem Feld gehören"""
+        return self.register_count - sum(
+            field.size for block in self.blocks for field in block.fields
+        )
+
+    def stats(self) -> dict:
+        """Requests pro Poll vor (ein Request pro Feld) und nach der Planung"""
+        return {
+            "fields": self.field_count,
+            "requests_unplanned": self.field_count,
+            "requests": self.request_count,
+            "registers": self.register_count,
+            "wasted_registers": self.wasted_registers,
+        }
+
+    def describe(self) -> list:
+        """Liefert die Requests eines Polls in lesbarer Form"""
+        return [
+            {
+                "start": block.start,
+                "count": block.count,
+                "fields": [field.slot for field in block.fields],
+            }
+            for block in self.blocks
+        ]
+
+    def __repr__(self):
+        return (
+            f"<ReadPlan requests={self.request_count} "
+            f"registers={self.register_count}>"
+        )
+
+
+def _split_blocks(entries, max_registers: int, request_cost: int) -> list:
+    """Optimale Aufteilung der sortierten Felder in zusammenhängende Blöcke.
+
+    Kosten eines Blocks = request_cost + gelesene Register. Minimiert per
+    dynamischer Programmierung die Summe über alle Blöcke, bei Gleichstand
+    gewinnt die Variante mit weniger Requests.
+    """
+    n = len(entries)
+    best = [(0, 0)] + [None] * n
+    cut = [0] * (n + 1)
+    for i in range(1, n + 1):
+        end = entries[i - 1][0] + entries[i - 1][1] - 1
+        for j in range(i - 1, -1, -1):
+            span = end - entries[j][0] + 1
+            if span > max_registers:
+                break
+            cost, requests = best[j]
+            candidate = (cost + request_cost + span, requests + 1)
+            if best[i] is None or candidate < best[i]:
+                best[i] = candidate
+                cut[i] = j
+
+    groups = []
+    i = n
+    while i > 0:
+        groups.append(entries[cut[i] : i])
+        i = cut[i]
+    groups.reverse()
+    return groups
+
+
+def compile_read_plan(
+    sensor_defs=SENSOR_DEFINITIONS,
+    max_registers: int = MAX_READ_REGISTERS,
+    request_cost: int = REQUEST_COST,
+) -> ReadPlan:
+    """Plant die Registerblöcke einmalig und berechnet die Offsets.
+
+    max_registers begrenzt die Blockgröße (höchstens 125 laut Modbus-Spezifikation),
+    request_cost gibt an, wie viele ungenutzte Register ein zusätzlicher Roundtrip
+    wert ist.
+    """
+    max_registers = max(1, min(max_registers, MAX_READ_REGISTERS))
+    entries = []
+    last_end = None
+    for addr in sorted(sensor_defs):
+        spec = sensor_defs[addr]
+        try:
+            size, code = _field_layout(spec)
+        except (KeyError, ValueError) as err:
+            raise ValueError(f"Register {addr} nicht dekodierbar: {err}") from err
+        if last_end is not None and addr <= last_end:
+            raise ValueError(f"Register {addr} überlappt mit dem vorherigen Eintrag")
+        if size > max_registers:
+            raise ValueError(f"Register {addr} passt nicht in {max_registers} Register")
+        entries.append((addr, size, code, spec))
+        last_end = addr + size - 1
+
+    blocks = []
+    for group in _split_blocks(entries, max_registers, request_cost):
+        start = group[0][0]
+        fields = tuple(
+            PlanField(
+                address=addr,
+                slot=spec["name"],
+                offset=addr - start,
+                size=size,
+                dtype=spec["type"].lower(),
+                code=code,
+                scale=spec.get("scale", 1),
+            )
+            for addr, size, code, spec in group
+        )
+        end = group[-1][0] + group[-1][1] - 1
+        blocks.append(PlanBlock(start, end - start + 1, fields))
+
+    plan = ReadPlan(blocks)
+    _LOGGER.debug(
+        "Modbus-Leseplan: %s Felder, %s Requests ohne / %s Requests mit Planung, "
+        "%s ungenutzte Register",
+        plan.field_count,
+        plan.field_count,
+        plan.request_count,
+        plan.wasted_registers,
+    )
+    return plan
+
+
+def compile_read_plans(sensor_defs=SENSOR_DEFINITIONS, **kwargs) -> dict:
+    """Ein eigener Leseplan pro Poll-Klasse ("poll" in der Registertabelle)"""
+    tiers: dict[str, dict] = {}
+    for addr, spec in sensor_defs.items():
+        poll = spec.get("poll", DEFAULT_POLL)
+        if poll not in POLL_INTERVALS:
+            raise ValueError(f"Unbekannte Poll-Klasse '{poll}' für Register {addr}")
+        tiers.setdefault(poll, {})[addr] = spec
+    return {
+        poll: compile_read_plan(tiers[poll], **kwargs)
+        for poll in POLL_INTERVALS
+        if poll in tiers
+    }
+
+
+@dataclass(frozen=True, slots=True)
+class SensorDescription:
+    """Fertig abgeleitete Eigenschaften einer Modbus-Entität"""
+
+    address: int
+    slot: str
+    name: str
+    unit: str | None
+    device_class: str | None
+    state_class: str | None
+    # Nur ENUM: Rohwert -> Text und die möglichen Texte
+    mapping: dict | None
+    options: tuple | None
+    device: str
+    enabled_default: bool = True
+
+
+# Einheiten und Device-Classes mit fortlaufendem Zähler bzw. Momentanwert
+_TOTAL_UNITS = frozenset(("Wh", "kWh", "VAh", "varh"))
+_MEASUREMENT_CLASSES = frozenset(
+    ("power", "voltage", "current", "battery", "temperature", "frequency")
+)
+
+
+def _describe(address: int, spec: dict) -> SensorDescription:
+    device_class = spec.get("device_class")
+    mapping = spec.get("map")
+    unit = spec["unit"]
+    if device_class == "enum":
+        return SensorDescription(
+            address=address,
+            slot=spec["name"],
+            name=spec["name"],
+            unit=None,
+            device_class="enum",
+            state_class=None,
+            mapping=dict(mapping) if mapping else {},
+            options=tuple(mapping.values()) if mapping else (),
+            device=spec["device"],
+            enabled_default=spec.get("enabled_default", True),
+        )
+    if device_class == "energy" or unit in _TOTAL_UNITS:
+        state_class = "total_increasing"
+    elif device_class in _MEASUREMENT_CLASSES:
+        state_class = "measurement"
+    else:
+        state_class = None
+    return SensorDescription(
+        address=address,
+        slot=spec["name"],
+        name=spec["name"],
+        unit=unit,
+        device_class=device_class,
+        state_class=state_class,
+        mapping=dict(mapping) if mapping else None,
+        options=None,
+        device=spec["device"],
+        enabled_default=spec.get("enabled_default", True),
+    )
+
+
+def compile_sensor_descriptions(sensor_defs=SENSOR_DEFINITIONS) -> tuple:
+    """Alle Einträge der Registertabelle als SensorDescription"""
+    return tuple(_describe(address, spec) for address, spec in sensor_defs.items())
+
+
+def compile_deadbands(sensor_defs=SENSOR_DEFINITIONS) -> dict:
+    """Slot -> (absolutes Totband, relatives Totband) für alle Register"""
+    deadbands = {}
+    for spec in sensor_defs.values():
+        absolute = spec.get("deadband", DEFAULT_DEADBANDS.get(spec.get("unit"), 0))
+        relative = spec.get("deadband_rel", 0)
+        if absolute or relative:
+            deadbands[spec["name"]] = (absolute, relative)
+    return deadbands
+
+
+def default_enabled(sensor_defs=SENSOR_DEFINITIONS) -> dict:
+    """Register, deren Entitäten standardmäßig aktiviert sind"""
+    return {
+        addr: spec
+        for addr, spec in sensor_defs.items()
+        if spec.get("enabled_default", True)
+    }
+
+
+# Standardpläne für die komplette Registertabelle bzw. die standardmäßig
+# aktivierten Register, einmalig beim Import erzeugt
+READ_PLAN = compile_read_plan(SENSOR_DEFINITIONS)
+READ_PLANS = compile_read_plans(default_enabled(SENSOR_DEFINITIONS))
+SENSOR_DESCRIPTIONS = compile_sensor_descriptions(SENSOR_DEFINITIONS)
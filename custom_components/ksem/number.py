@@ -8,83 +8,69 @@ _LOGGER = logging.getLogger(__name__)
 
 async def async_setup_entry(hass, entry, async_add_entities):
     data = hass.data[DOMAIN][entry.entry_id]
-    client = data["client"]
+    writer = data["chargemode_writer"]
+    coalescer = data["write_coalescer"]
     device_info = data.get("wallbox_device_info")
-    last_ws_data = data.get("last_chargemode", {})
 
-    entity1 = MinPvPowerQuota(
-        client, device_info, last_ws_data.get("minpvpowerquota", 0), entry.entry_id
-    )
-    entity2 = MinChargingPowerQuota(
-        client, device_info, last_ws_data.get("mincharginpowerquota", 0), entry.entry_id
-    )
-
-    # Live-Zugriff für WS-Listener ermöglichen
-    hass.data[DOMAIN][entry.entry_id]["quota_entities"] = {
-        "minpv": entity1,
-        "mincharge": entity2,
-    }
+    entity1 = MinPvPowerQuota(writer, coalescer, device_info)
+    entity2 = MinChargingPowerQuota(writer, coalescer, device_info)
 
     async_add_entities([entity1, entity2])
 
 
 class MinPvPowerQuota(NumberEntity):
-    def __init__(self, client, device_info: DeviceInfo, initial, entry_id):
-        self._entry_id = entry_id
-        self._client = client
+    def __init__(self, writer, coalescer, device_info: DeviceInfo):
+        self._writer = writer
+        self._coalescer = coalescer
         self._attr_name = "Min PV Power"
         self._attr_unique_id = "ksem_minpvpowerquota"
         self._attr_device_info = device_info
         self._attr_native_min_value = 0
         self._attr_native_max_value = 100
         self._attr_native_step = 10
-        self._value = initial
+
+    async def async_added_to_hass(self):
+        # Optimistische Werte und WebSocket-Echo kommen über den Writer,
+        # geschrieben wird gesammelt über den Coalescer
+        self.async_on_remove(
+            self._writer.async_add_listener(
+                lambda: self._coalescer.async_schedule(self)
+            )
+        )
+        self.async_on_remove(lambda: self._coalescer.async_discard(self))
 
     @property
     def native_value(self):
-        return self._value
+        return self._writer.state.get("minpvpowerquota")
 
     async def async_set_native_value(self, value: float):
-        await self._client.set_charge_mode(
-            mode=None,
-            minpvpowerquota=int(value),
-            mincharginpowerquota=None,
-            entry_id=self._entry_id,
-        )
-        self._value = int(value)
-        self.async_write_ha_state()
-
-    def update_value(self, value: int):
-        self._value = value
-        self.async_write_ha_state()
+        await self._writer.async_set(minpvpowerquota=int(value))
 
 
 class MinChargingPowerQuota(NumberEntity):
-    def __init__(self, client, device_info: DeviceInfo, initial, entry_id):
-        self._entry_id = entry_id
-        self._client = client
+    def __init__(self, writer, coalescer, device_info: DeviceInfo):
+        self._writer = writer
+        self._coalescer = coalescer
         self._attr_name = "Min Charging Power"
         self._attr_unique_id = "ksem_mincharginpowerquota"
         self._attr_device_info = device_info
         self._attr_native_min_value = 0
         self._attr_native_max_value = 100
         self._attr_native_step = 25
-        self._value = initial
+
+    async def async_added_to_hass(self):
+        # Optimistische Werte und WebSocket-Echo kommen über den Writer,
+        # geschrieben wird gesammelt über den Coalescer
+        self.async_on_remove(
+            self._writer.async_add_listener(
+                lambda: self._coalescer.async_schedule(self)
+            )
+        )
+        self.async_on_remove(lambda: self._coalescer.async_discard(self))
 
     @property
     def native_value(self):
-        return self._value
+        return self._writer.state.get("mincharginpowerquota")
 
     async def async_set_native_value(self, value: float):
-        await self._client.set_charge_mode(
-            mode=None,
-            mincharginpowerquota=int(value),
-            minpvpowerquota=None,
-            entry_id=self._entry_id,
-        )
-        self._value = int(value)
-        self.async_write_ha_state()
-
-    def update_value(self, value: int):
-        self._value = value
-        self.async_write_ha_state()
+        await self._writer.async_set(mincharginpowerquota=int(value))
@@ -0,0 +1,206 @@
+"""Deklarative Tabelle zusätzlicher REST-Endpunkte des KSEM (siehe api.md).
+
+Jeder Endpunkt beschreibt Pfad, Abfrageintervall, einen optionalen Parser für
+die Rohantwort und die Entitäten, die aus ihm entstehen. Neue Endpunkte
+brauchen nur einen Eintrag in REST_ENDPOINTS; KsemRestCoordinator fragt alle
+fälligen Endpunkte pro Tick gemeinsam und parallel ab.
+
+/api/e-mobility/phaseusage ist nur per PUT erreichbar und fehlt daher hier.
+"""
+
+import datetime
+from dataclasses import dataclass
+from typing import Any, Callable
+
+
+@dataclass(frozen=True)
+class RestValue:
+    """Eine Entität aus der (geparsten) Antwort eines Endpunkts"""
+
+    key: str
+    name: str
+    # Schlüssel bzw. Listenindizes vom geparsten Ergebnis bis zum Wert
+    source: tuple
+    convert: Callable[[Any], Any] | None = None
+    unit: str | None = None
+    device_class: str | None = None
+    state_class: str | None = None
+    # "sensor" oder "binary_sensor"
+    platform: str = "sensor"
+    # Gerät, dem die Entität zugeordnet wird: "smartmeter" oder "wallbox"
+    device: str = "smartmeter"
+    enabled_default: bool = True
+
+    def extract(self, data):
+        for step in self.source:
+            data = data[step]
+        return self.convert(data) if self.convert else data
+
+
+@dataclass(frozen=True)
+class RestEndpoint:
+    """Ein per GET abgefragter Endpunkt und seine Entitäten"""
+
+    key: str
+    path: str
+    interval: int  # Sekunden
+    values: tuple
+    parser: Callable[[Any], Any] | None = None
+
+    def parse(self, raw) -> dict:
+        """Rohantwort -> {Wert-Schlüssel: Wert}; fehlende Felder werden None"""
+        try:
+            data = self.parser(raw) if self.parser else raw
+        except (KeyError, IndexError, TypeError, ValueError):
+            data = None
+        result = {}
+        for value in self.values:
+            try:
+                result[value.key] = value.extract(data)
+            except (KeyError, IndexError, TypeError, ValueError):
+                result[value.key] = None
+        return result
+
+
+def _milliamps(value):
+    return value / 1000
+
+
+def _timestamp(value):
+    return datetime.datetime.fromtimestamp(value, tz=datetime.timezone.utc)
+
+
+def _current_steps(steps):
+    steps = sorted(steps)
+    return {"count": len(steps), "min": steps[0], "max": steps[-1]}
+
+
+REST_ENDPOINTS = (
+    RestEndpoint(
+        key="overload_protection",
+        path="/api/e-mobility/config/overloadprotection",
+        interval=3600,
+        values=(
+            RestValue(
+                "grid_type", "Netzart (Phasen)", ("grid_type",), device="wallbox"
+            ),
+            *(
+                RestValue(
+                    f"main_fuse_l{phase + 1}",
+                    f"Hauptsicherung L{phase + 1}",
+                    ("main_fuse", phase),
+                    convert=_milliamps,
+                    unit="A",
+                    device_class="current",
+                    device="wallbox",
+                )
+                for phase in range(3)
+            ),
+            RestValue(
+                "overload_inconsistent_cfg",
+                "Überlastschutz Konfiguration inkonsistent",
+                ("inconsistent_cfg",),
+                device_class="problem",
+                platform="binary_sensor",
+                device="wallbox",
+            ),
+        ),
+    ),
+    RestEndpoint(
+        key="evse_limit",
+        path="/api/e-mobility/evselimit",
+        interval=3600,
+        values=(
+            RestValue("evse_limit", "EVSE-Limit", ("limit",), device="wallbox"),
+        ),
+    ),
+    RestEndpoint(
+        key="probing_current_steps",
+        path="/api/e-mobility/probing/currentsteps",
+        interval=3600,
+        parser=_current_steps,
+        values=(
+            RestValue(
+                "probing_steps",
+                "Probing Stromstufen",
+                ("count",),
+                device="wallbox",
+            ),
+            RestValue(
+                "probing_min_current",
+                "Probing minimaler Strom",
+                ("min",),
+                convert=_milliamps,
+                unit="A",
+                device_class="current",
+                device="wallbox",
+            ),
+            RestValue(
+                "probing_max_current",
+                "Probing maximaler Strom",
+                ("max",),
+                convert=_milliamps,
+                unit="A",
+                device_class="current",
+                device="wallbox",
+            ),
+        ),
+    ),
+    RestEndpoint(
+        key="network",
+        path="/api/device-settings/network",
+        interval=3600,
+        values=(
+            RestValue("network_mode", "Netzwerkmodus", ("mode",)),
+            RestValue("hostname", "Hostname", ("hostname",)),
+            RestValue(
+                "upnp",
+                "UPnP aktiv",
+                ("upnpstatus",),
+                platform="binary_sensor",
+                enabled_default=False,
+            ),
+        ),
+    ),
+    RestEndpoint(
+        key="local_time",
+        path="/api/device-settings/local-time",
+        interval=300,
+        values=(
+            RestValue(
+                "local_time",
+                "Gerätezeit",
+                ("time",),
+                convert=_timestamp,
+                device_class="timestamp",
+            ),
+            RestValue(
+                "ntp_synced",
+                "NTP synchronisiert",
+                ("ntp_synced",),
+                platform="binary_sensor",
+            ),
+        ),
+    ),
+    RestEndpoint(
+        key="smtp",
+        path="/api/device-settings/smtp/config",
+        interval=3600,
+        # Nur ausgewählte Felder übernehmen, das SMTP-Passwort nie
+        values=(
+            RestValue(
+                "smtp_server", "SMTP Server", ("server",), enabled_default=False
+            ),
+            RestValue(
+                "smtp_tls",
+                "SMTP TLS",
+                ("tls",),
+                platform="binary_sensor",
+                enabled_default=False,
+            ),
+        ),
+    ),
+)
+
+# Wert-Schlüssel -> Beschreibung, für die Plattformen
+REST_VALUES = {value.key: value for ep in REST_ENDPOINTS for value in ep.values}
@@ -0,0 +1,120 @@
+"""Laufzeitstatistik der REST-Aufrufe an den KSEM, je Endpunkt"""
+
+import re
+from collections import deque
+
+# Latenzwerte je Endpunkt, aus denen p50/p95/max berechnet werden
+LATENCY_WINDOW = 256
+
+# Obergrenze für getrennt geführte Endpunkte, alles darüber landet in "other"
+MAX_ENDPOINTS = 64
+
+# UUIDs (z. B. der Wallbox) im Pfad zusammenfassen, damit jede Wallbox
+# nicht einen eigenen Endpunkt erzeugt
+_UUID = re.compile(
+    r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}"
+)
+
+
+def endpoint_key(method: str, path: str) -> str:
+    """Methode und Pfad ohne Query und mit {uuid} statt konkreter IDs"""
+    return f"{method} {_UUID.sub('{uuid}', path.split('?', 1)[0])}"
+
+
+def _percentile(ordered, pct: float):
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))]
+
+
+def _latency_summary(latencies) -> dict:
+    ordered = sorted(latencies)
+    return {
+        "p50_ms": _ms(_percentile(ordered, 50)),
+        "p95_ms": _ms(_percentile(ordered, 95)),
+        "max_ms": _ms(ordered[-1] if ordered else None),
+    }
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 1)
+
+
+class EndpointStats:
+    """Zähler und Latenzfenster eines Endpunkts.
+
+    Auf dem Request-Pfad wird nur gezählt und angehängt; Perzentile entstehen
+    erst beim Auslesen.
+    """
+
+    __slots__ = ("requests", "errors", "reauths", "bytes", "status", "latencies")
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.requests = 0
+        self.errors = 0
+        self.reauths = 0
+        self.bytes = 0
+        # HTTP-Status bzw. Name der Exception -> Anzahl
+        self.status: dict = {}
+        self.latencies = deque(maxlen=window)
+
+    def record(self, status: int, latency: float, size: int):
+        self.requests += 1
+        self.bytes += size
+        self.status[status] = self.status.get(status, 0) + 1
+        if status >= 400:
+            self.errors += 1
+        self.latencies.append(latency)
+
+    def record_error(self, err: Exception, latency: float):
+        name = type(err).__name__
+        self.requests += 1
+        self.errors += 1
+        self.status[name] = self.status.get(name, 0) + 1
+        self.latencies.append(latency)
+
+    def as_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "reauths": self.reauths,
+            "bytes": self.bytes,
+            "status": {str(key): count for key, count in self.status.items()},
+            **_latency_summary(self.latencies),
+        }
+
+
+class RestStats:
+    """Statistik aller Endpunkte eines KsemClient"""
+
+    def __init__(self, window: int = LATENCY_WINDOW, max_endpoints: int = MAX_ENDPOINTS):
+        self._window = window
+        self._max_endpoints = max_endpoints
+        self._endpoints: dict[str, EndpointStats] = {}
+
+    def endpoint(self, method: str, path: str) -> EndpointStats:
+        key = endpoint_key(method, path)
+        stats = self._endpoints.get(key)
+        if stats is None:
+            if len(self._endpoints) >= self._max_endpoints:
+                key = "other"
+                stats = self._endpoints.get(key)
+            if stats is None:
+                stats = self._endpoints[key] = EndpointStats(self._window)
+        return stats
+
+    def totals(self) -> dict:
+        """Summen über alle Endpunkte, Latenzen aus allen Fenstern"""
+        endpoints = self._endpoints.values()
+        return {
+            "requests": sum(e.requests for e in endpoints),
+            "errors": sum(e.errors for e in endpoints),
+            "reauths": sum(e.reauths for e in endpoints),
+            "bytes": sum(e.bytes for e in endpoints),
+            **_latency_summary(
+                [latency for e in endpoints for latency in e.latencies]
+            ),
+        }
+
+    def as_dict(self) -> dict:
+        return {key: stats.as_dict() for key, stats in sorted(self._endpoints.items())}
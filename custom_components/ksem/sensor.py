@@ -1,13 +1,18 @@
 import logging
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
-from homeassistant.components.sensor import SensorEntity, SensorStateClass
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.components.sensor import (
+    SensorEntity,
+    SensorEntityDescription,
+    SensorStateClass,
+)
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from homeassistant.helpers.device_registry import DeviceInfo
 from .const import DOMAIN
+from .gdr import GDR_SENSORS, GDR_UNVERIFIED
 from homeassistant.helpers.entity import EntityCategory
-from .modbus_map import SENSOR_DEFINITIONS
-from homeassistant.components.sensor import SensorDeviceClass
+from .modbus_plan import SENSOR_DESCRIPTIONS
+from .rest_registry import REST_VALUES
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -22,14 +27,28 @@ SENSOR_TYPES = {
     "FlashDataTotal": ("Flash Data Total", "B"),
 }
 
+# Summen aus KsemClient.stats.totals(): Schlüssel -> (Name, Einheit, State-Class)
+REST_STATS_TYPES = {
+    "requests": ("REST Requests", None, SensorStateClass.TOTAL_INCREASING),
+    "errors": ("REST Fehler", None, SensorStateClass.TOTAL_INCREASING),
+    "reauths": ("REST Re-Logins", None, SensorStateClass.TOTAL_INCREASING),
+    "bytes": ("REST Bytes empfangen", "B", SensorStateClass.TOTAL_INCREASING),
+    "p50_ms": ("REST Latenz p50", "ms", SensorStateClass.MEASUREMENT),
+    "p95_ms": ("REST Latenz p95", "ms", SensorStateClass.MEASUREMENT),
+    "max_ms": ("REST Latenz max", "ms", SensorStateClass.MEASUREMENT),
+}
+
 
 async def async_setup_entry(
     hass: HomeAssistant, entry: ConfigEntry, async_add_entities
 ) -> None:
     data = hass.data[DOMAIN][entry.entry_id]
     smart = data["smart_coordinator"]
-    wallbox = data["wallbox_coordinator"]
+    wallbox = data["wallbox_config_coordinator"]
+    wallbox_state = data["wallbox_state_coordinator"]
     modbus = data["modbus_coordinator"]
+    modbus_client = data["modbus_client"]
+    client = data["client"]
     device_info = data["device_info"]
     serial = data["serial"]
 
@@ -38,7 +57,16 @@ async def async_setup_entry(
         for key, (name, unit) in SENSOR_TYPES.items()
     ]
 
+    rest_stats_entities = [
+        KsemRestStatsSensor(client, key, name, unit, state_class, device_info, serial)
+        for key, (name, unit, state_class) in REST_STATS_TYPES.items()
+    ]
+
+    gdr = data["gdr_coordinator"]
+    evse_state = data["evse_state_coordinator"]
+    coalescer = data["write_coalescer"]
     wallbox_entities = []
+    gdr_entities = []
     wallbox_device_info = None
     for wb in wallbox.data.get("evse", []):
         uuid = wb.get("uuid")
@@ -59,26 +87,64 @@ async def async_setup_entry(
         )
 
         wallbox_entities.append(
-            KsemWallboxSensor(uuid, f"{label} State", model, serial, version, state)
+            KsemWallboxSensor(
+                evse_state,
+                coalescer,
+                uuid,
+                f"{label} State",
+                model,
+                serial,
+                version,
+                state,
+            )
+        )
+        gdr_entities.extend(
+            KsemGdrSensor(gdr, coalescer, uuid, obis, spec, wallbox_device_info)
+            for obis, spec in GDR_SENSORS.items()
         )
 
+    # Ab jetzt nur noch Register pollen, deren Entität aktiviert ist. Deaktivierte
+    # Entitäten werden nie zu hass hinzugefügt und melden sich daher nicht an.
+    modbus_client.set_enabled_addresses(set())
     obis_entities = []
-    for addr, spec in SENSOR_DEFINITIONS.items():
-        if spec["device"] == "smartmeter":
-            info = device_info
-        elif spec["device"] == "wallbox":
+    for description in SENSOR_DESCRIPTIONS:
+        if description.device == "wallbox":
             info = wallbox_device_info
         else:
-            info = device_info  # fallback
-        obis_entities.append(KsemObisModbusSensor(modbus, addr, spec, info))
+            info = device_info  # Smartmeter und Fallback
+        obis_entities.append(
+            KsemObisModbusSensor(modbus, modbus_client, description, info)
+        )
 
     # Speichere device_info zur Weitergabe
     hass.data[DOMAIN][entry.entry_id]["wallbox_device_info"] = wallbox_device_info
 
-    evse_power_entity = KsemEvseAvailablePowerSensor(wallbox, wallbox_device_info)
+    rest = data["rest_coordinator"]
+    rest_entities = [
+        KsemRestSensor(
+            rest,
+            value,
+            (wallbox_device_info or device_info)
+            if value.device == "wallbox"
+            else device_info,
+            data["serial"],
+        )
+        for value in REST_VALUES.values()
+        if value.platform == "sensor"
+    ]
+
+    evse_power_entity = KsemEvseAvailablePowerSensor(
+        wallbox_state, wallbox_device_info
+    )
 
     async_add_entities(
-        smartmeter_entities + wallbox_entities + [evse_power_entity] + obis_entities
+        smartmeter_entities
+        + rest_stats_entities
+        + wallbox_entities
+        + gdr_entities
+        + [evse_power_entity]
+        + obis_entities
+        + rest_entities
     )
 
 
@@ -140,19 +206,136 @@ class KsemSmartmeterSensor(CoordinatorEntity, SensorEntity):
         return self.coordinator.data.get(self._sensor_key)
 
 
-class KsemWallboxSensor(SensorEntity):
-    def __init__(self, uuid, name, model, serial, version, value):
+class KsemRestStatsSensor(SensorEntity):
+    """Laufzeitstatistik der REST-Aufrufe, wird von HA periodisch abgefragt"""
+
+    _attr_should_poll = True
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(self, client, key, name, unit, state_class, device_info, serial):
+        self._client = client
+        self._stats_key = key
+        self._attr_name = name
+        self._attr_native_unit_of_measurement = unit
+        self._attr_state_class = state_class
+        self._attr_unique_id = f"{serial}_rest_{key}"
+        self._attr_device_info = device_info
+
+    async def async_update(self):
+        self._attr_native_value = self._client.stats.totals()[self._stats_key]
+
+
+class KsemRestSensor(CoordinatorEntity, SensorEntity):
+    """Wert aus einem Endpunkt der REST-Tabelle (rest_registry)"""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(self, coordinator, value, device_info, serial):
+        super().__init__(coordinator)
+        self._key = value.key
+        self._attr_name = value.name
+        self._attr_unique_id = f"{serial}_api_{value.key}"
+        self._attr_native_unit_of_measurement = value.unit
+        self._attr_device_class = value.device_class
+        self._attr_state_class = value.state_class
+        self._attr_entity_registry_enabled_default = value.enabled_default
+        self._attr_device_info = device_info
+
+    @property
+    def native_value(self):
+        return (self.coordinator.data or {}).get(self._key)
+
+
+class KsemGdrSensor(CoordinatorEntity, SensorEntity):
+    """Wallbox-Messwert aus dem GDR-WebSocket (Push, siehe KsemGdrCoordinator)"""
+
+    def __init__(self, coordinator, coalescer, uuid, obis, spec, device_info):
+        super().__init__(coordinator)
+        self._coalescer = coalescer
+        name, unit, factor, device_class, state_class = spec
+        self._uuid = uuid
+        self._obis = obis
+        self._factor = factor
+        self._attr_name = name
+        self._attr_unique_id = f"{uuid}_gdr_{obis}"
+        self._attr_native_unit_of_measurement = unit
+        self._attr_device_class = device_class
+        self._attr_state_class = state_class
+        self._attr_device_info = device_info
+        self._attr_entity_registry_enabled_default = obis not in GDR_UNVERIFIED
+
+    async def async_added_to_hass(self):
+        await super().async_added_to_hass()
+        self.async_on_remove(lambda: self._coalescer.async_discard(self))
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        # Push-Frames kommen in Bursts: gesammelt schreiben
+        self._coalescer.async_schedule(self)
+
+    def _value(self):
+        gdr = (self.coordinator.data or {}).get(self._uuid)
+        return gdr["values"].get(self._obis) if gdr else None
+
+    @property
+    def available(self) -> bool:
+        return super().available and self._value() is not None
+
+    @property
+    def native_value(self):
+        value = self._value()
+        return value * self._factor if value is not None else None
+
+
+def _vehicle_flags(state: str | None) -> tuple[bool, bool]:
+    """(Fahrzeug verbunden, lädt) aus dem State-Namen, z. B. "stateCharging" """
+    name = (state or "").lower()
+    charging = "charging" in name
+    connected = charging or ("connected" in name and "disconnected" not in name)
+    return connected, charging
+
+
+class KsemWallboxSensor(CoordinatorEntity, SensorEntity):
+    """Status einer Wallbox, per Push aus dem evse/+/state-WebSocket"""
+
+    def __init__(
+        self, coordinator, coalescer, uuid, name, model, serial, version, value
+    ):
+        super().__init__(coordinator)
+        self._coalescer = coalescer
         self._attr_name = name
         self._attr_unique_id = f"{uuid}_state"
         self._uuid = uuid
         self._model = model
         self._serial = serial
         self._version = version
-        self._state = value
+        # Stand der Einrichtung, bis der Stream die Wallbox meldet
+        self._initial = value
+
+    async def async_added_to_hass(self):
+        await super().async_added_to_hass()
+        self.async_on_remove(lambda: self._coalescer.async_discard(self))
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        # Push-Frames kommen in Bursts: gesammelt schreiben
+        self._coalescer.async_schedule(self)
+
+    def _evse(self) -> dict:
+        return (self.coordinator.data or {}).get(self._uuid) or {}
+
+    @property
+    def native_value(self):
+        return self._evse().get("state", self._initial)
 
     @property
-    def state(self):
-        return self._state
+    def extra_state_attributes(self) -> dict:
+        connected, charging = _vehicle_flags(self.native_value)
+        return {
+            "parent_state": self._evse().get("parent_state"),
+            "connected": connected,
+            "charging": charging,
+        }
 
     @property
     def unique_id(self):
@@ -170,47 +353,70 @@ class KsemWallboxSensor(SensorEntity):
         }
 
 
+def _entity_description(description) -> SensorEntityDescription:
+    return SensorEntityDescription(
+        key=description.slot,
+        name=description.name,
+        native_unit_of_measurement=description.unit,
+        device_class=description.device_class,
+        state_class=description.state_class,
+        options=list(description.options)
+        if description.options is not None
+        else None,
+        entity_registry_enabled_default=description.enabled_default,
+    )
+
+
+# Einmal beim Import: HA liest Name, Einheit, Klassen und Optionen direkt aus
+# der Beschreibung, statt sie pro Entität über _attr_-Setter zu setzen
+OBIS_ENTITY_DESCRIPTIONS = {
+    description.address: _entity_description(description)
+    for description in SENSOR_DESCRIPTIONS
+}
+
+
 class KsemObisModbusSensor(CoordinatorEntity, SensorEntity):
-    def __init__(self, coordinator, address, spec, device_info):
-        super().__init__(coordinator)
-        self._address = address
-        self._key = spec["name"]
-        self._mapping = spec.get("map")
-        self._attr_name = f"{spec['name']}"
-        self._attr_native_unit_of_measurement = spec["unit"]
-        # ENUM-Erkennung
-        if spec.get("device_class") == "enum":
-            self._attr_device_class = SensorDeviceClass.ENUM
-            self._attr_options = list(self._mapping.values()) if self._mapping else []
-            self._attr_native_unit_of_measurement = None
-            self._attr_state_class = None
-        else:
-            self._attr_device_class = spec.get("device_class")
-            if spec.get("device_class") == "energy" or spec.get("unit") in (
-                "Wh",
-                "kWh",
-                "VAh",
-                "varh",
-            ):
-                self._attr_state_class = SensorStateClass.TOTAL_INCREASING
-            elif spec.get("device_class") in (
-                "power",
-                "voltage",
-                "current",
-                "battery",
-                "temperature",
-                "frequency",
-            ):
-                self._attr_state_class = SensorStateClass.MEASUREMENT
-            else:
-                self._attr_state_class = None
+    """Modbus-Wert; alle Eigenschaften kommen vorberechnet aus SensorDescription"""
+
+    def __init__(self, coordinator, modbus_client, description, device_info):
+        # Kontext = Snapshot-Schlüssel: nur bei Änderung dieses Werts aufwecken
+        super().__init__(coordinator, context=description.slot)
+        self._modbus_client = modbus_client
+        self._address = description.address
+        self._key = description.slot
+        self._mapping = description.mapping
+        entity_description = OBIS_ENTITY_DESCRIPTIONS.get(description.address)
+        if entity_description is None or entity_description.key != description.slot:
+            # Beschreibung außerhalb der Standardtabelle
+            entity_description = _entity_description(description)
+        self.entity_description = entity_description
         ident = next(iter(device_info["identifiers"]))[1]
-        self._attr_unique_id = f"{ident}_obis_{address}"
+        self._attr_unique_id = f"{ident}_obis_{description.address}"
         self._attr_device_info = device_info
 
+    async def async_added_to_hass(self):
+        self._modbus_client.enable_address(self._address)
+        await super().async_added_to_hass()
+        # Gezielte Updates nur bei Änderung des eigenen Werts
+        self.async_on_remove(
+            self.coordinator.async_add_value_listener(
+                self._key, self._handle_coordinator_update
+            )
+        )
+        if self._key not in (self.coordinator.data or {}):
+            # Register war bisher nicht im Leseplan
+            await self.coordinator.async_request_refresh()
+
+    async def async_will_remove_from_hass(self):
+        self._modbus_client.disable_address(self._address)
+        await super().async_will_remove_from_hass()
+
     @property
     def native_value(self):
         val = self.coordinator.data.get(self._key)
-        if self._mapping:
-            return self._mapping.get(int(val), f"Unbekannt ({val})")
-        return val
+        mapping = self._mapping
+        if mapping is None or val is None:
+            return val
+        # Ganzzahlige Floats treffen dieselben Schlüssel (hash(2.0) == hash(2))
+        text = mapping.get(val)
+        return text if text is not None else f"Unbekannt ({val})"
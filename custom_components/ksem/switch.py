@@ -8,7 +8,7 @@ _LOGGER = logging.getLogger(__name__)
 
 async def async_setup_entry(hass, entry, async_add_entities):
     data = hass.data[DOMAIN][entry.entry_id]
-    coordinator = data["wallbox_coordinator"]
+    coordinator = data["wallbox_config_coordinator"]
     client = data["client"]
     device_info = data.get("wallbox_device_info")
 
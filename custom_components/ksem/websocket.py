@@ -0,0 +1,231 @@
+"""WebSocket-Verbindungen eines Config-Eintrags zum KSEM.
+
+Der KSEM liefert jedes Thema unter einer eigenen URL
+(/api/data-transfer/ws/<Format>/<Thema>). KsemWebsocketManager hält pro
+abonniertem Thema eine Verbindung, holt vor jedem Verbindungsaufbau ein
+gültiges Token vom TokenManager, verbindet nach Abbrüchen mit wachsender
+Wartezeit neu und verteilt dekodierte Nachrichten per Dispatcher-Signal:
+
+    remove = manager.async_subscribe("chargemode", handle_message)
+
+Zusätzlich meldet ein zweites Signal pro Thema den Verbindungszustand
+(True nach dem Verbinden, False nach dem Trennen), etwa um nach einem
+Neuverbinden Verpasstes per REST nachzuladen. Die Tasks laufen als
+Hintergrund-Tasks des Eintrags und enden beim Entladen.
+"""
+
+import asyncio
+import json
+import logging
+import random
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from aiohttp import ClientConnectionError, WSMsgType, WSServerHandshakeError
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.dispatcher import (
+    async_dispatcher_connect,
+    async_dispatcher_send,
+)
+
+from .gdr import decode_gdrs
+from .helper import bearer_header
+
+_LOGGER = logging.getLogger(__name__)
+
+WS_URL = "ws://{host}/api/data-transfer/ws/{path}"
+
+# Wartezeit vor dem ersten Neuverbinden und Obergrenze beim Verdoppeln (Sekunden)
+RECONNECT_DELAY = 1
+RECONNECT_DELAY_MAX = 300
+
+WS_HEARTBEAT = 30
+
+
+@dataclass(frozen=True)
+class WsTopic:
+    """Ein Thema des KSEM-WebSockets und wie seine Frames dekodiert werden"""
+
+    key: str
+    path: str
+    # Frame (str bzw. bytes) -> Nachricht für die Abonnenten
+    decode: Callable[[Any], Any]
+    binary: bool = False
+
+
+WS_TOPICS = {
+    topic.key: topic
+    for topic in (
+        WsTopic(
+            "chargemode",
+            "json/json/local/config/e-mobility/chargemode",
+            json.loads,
+        ),
+        WsTopic("evse_state", "json/json/local/evse/+/state", json.loads),
+        WsTopic(
+            "gdr",
+            "protobuf/gdr/local/values/+/evse",
+            decode_gdrs,
+            binary=True,
+        ),
+    )
+}
+
+
+class KsemWebsocketManager:
+    """Besitzt alle WebSocket-Verbindungen eines Eintrags"""
+
+    def __init__(
+        self, hass: HomeAssistant, entry: ConfigEntry, client, recorder=None
+    ):
+        self.hass = hass
+        self._entry = entry
+        self._client = client
+        # Optionaler Mitschnitt der Rohframes (capture.TrafficRecorder)
+        self._recorder = recorder
+        self._running: set[str] = set()
+        self.connected: dict[str, bool] = {}
+        self.stats: dict[str, dict] = {}
+
+    def signal(self, topic: str) -> str:
+        return f"ksem_ws_{self._entry.entry_id}_{topic}"
+
+    def connection_signal(self, topic: str) -> str:
+        return f"{self.signal(topic)}_connection"
+
+    @callback
+    def async_subscribe(
+        self, topic: str, target, connection_target=None
+    ) -> CALLBACK_TYPE:
+        """target(Nachricht) für jede Nachricht des Themas, optional
+        connection_target(verbunden) bei jedem Verbinden und Trennen.
+        Die Verbindung startet mit dem ersten Abonnenten."""
+        if topic not in WS_TOPICS:
+            raise ValueError(f"Unbekanntes WebSocket-Thema: {topic}")
+        removers = [async_dispatcher_connect(self.hass, self.signal(topic), target)]
+        if connection_target is not None:
+            removers.append(
+                async_dispatcher_connect(
+                    self.hass, self.connection_signal(topic), connection_target
+                )
+            )
+        self._async_start(topic)
+
+        @callback
+        def remove() -> None:
+            for remover in removers:
+                remover()
+
+        return remove
+
+    @callback
+    def _async_start(self, topic: str):
+        if topic in self._running:
+            return
+        self._running.add(topic)
+        self.connected[topic] = False
+        self.stats[topic] = {
+            "connects": 0,
+            "messages": 0,
+            "decode_errors": 0,
+            "auth_failures": 0,
+        }
+        self._entry.async_create_background_task(
+            self.hass,
+            self._async_run(WS_TOPICS[topic]),
+            f"ksem_ws_{topic}_{self._entry.entry_id}",
+        )
+
+    @callback
+    def _async_set_connected(self, topic: str, connected: bool):
+        if self.connected[topic] == connected:
+            return
+        self.connected[topic] = connected
+        async_dispatcher_send(self.hass, self.connection_signal(topic), connected)
+
+    async def _async_run(self, topic: WsTopic):
+        url = WS_URL.format(host=self._client.host, path=topic.path)
+        session = async_get_clientsession(self.hass)
+        health = self._client.health
+        tokens = self._client.tokens
+        stats = self.stats[topic.key]
+        delay = RECONNECT_DELAY
+
+        while True:
+            # Solange der KSEM als offline gilt, keine eigenen Verbindungsversuche
+            await health.async_wait_available()
+            token = None
+            received = stats["messages"]
+            try:
+                # Bei jedem Verbindungsaufbau ein aktuelles Token
+                token = await tokens.async_get_token()
+                async with session.ws_connect(
+                    url,
+                    headers=bearer_header(token.access_token),
+                    heartbeat=WS_HEARTBEAT,
+                ) as ws:
+                    await ws.send_str(f"Bearer {token.access_token}")
+                    health.record_success()
+                    stats["connects"] += 1
+                    _LOGGER.info("WebSocket %s verbunden", topic.key)
+                    self._async_set_connected(topic.key, True)
+                    await self._async_receive(topic, ws, stats)
+            except WSServerHandshakeError as err:
+                if err.status == 401:
+                    # Token abgelaufen oder widerrufen: beim nächsten Versuch neu
+                    stats["auth_failures"] += 1
+                    try:
+                        await tokens.async_invalidate(token)
+                    except Exception as login_err:
+                        # Der Task darf hier nicht enden, sonst verbindet das
+                        # Thema bis zum Neuladen nie wieder
+                        _LOGGER.warning(
+                            "WebSocket %s: Neuanmeldung fehlgeschlagen: %s",
+                            topic.key,
+                            login_err,
+                        )
+                _LOGGER.warning("WebSocket %s abgelehnt: %s", topic.key, err)
+            except (ClientConnectionError, asyncio.TimeoutError) as err:
+                health.record_failure(err)
+                _LOGGER.warning(
+                    "WebSocket-Verbindung %s fehlgeschlagen: %s", topic.key, err
+                )
+            except Exception as err:
+                _LOGGER.warning(
+                    "WebSocket-Verbindung %s fehlgeschlagen: %s", topic.key, err
+                )
+
+            self._async_set_connected(topic.key, False)
+            # Zurück auf die kurze Wartezeit erst, wenn die Verbindung Daten
+            # geliefert hat; ein Gerät, das sofort wieder trennt, bremst so ab
+            if stats["messages"] > received:
+                delay = RECONNECT_DELAY
+            wait = delay * random.uniform(0.8, 1.2)
+            _LOGGER.debug(
+                "WebSocket %s getrennt, Neuverbindung in %.1f s", topic.key, wait
+            )
+            await asyncio.sleep(wait)
+            delay = min(delay * 2, RECONNECT_DELAY_MAX)
+
+    async def _async_receive(self, topic: WsTopic, ws, stats: dict):
+        signal = self.signal(topic.key)
+        expected = WSMsgType.BINARY if topic.binary else WSMsgType.TEXT
+        async for msg in ws:
+            if msg.type == expected:
+                if self._recorder is not None:
+                    self._recorder.record_ws(topic.path, msg.data)
+                try:
+                    message = topic.decode(msg.data)
+                except ValueError as err:
+                    stats["decode_errors"] += 1
+                    _LOGGER.debug(
+                        "WebSocket %s: Frame nicht lesbar: %s", topic.key, err
+                    )
+                    continue
+                stats["messages"] += 1
+                async_dispatcher_send(self.hass, signal, message)
+            elif msg.type == WSMsgType.ERROR:
+                _LOGGER.warning("WebSocket-Fehler %s: %s", topic.key, msg.data)
+                return
@@ -0,0 +1,14 @@
+"""Macht custom_components/ksem als Paket "ksem" importierbar, ohne das
+Paket-__init__ (und damit Home Assistant) zu laden."""
+
+import pathlib
+import sys
+import types
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+PACKAGE_DIR = ROOT / "custom_components" / "ksem"
+
+if "ksem" not in sys.modules:
+    _pkg = types.ModuleType("ksem")
+    _pkg.__path__ = [str(PACKAGE_DIR)]
+    sys.modules["ksem"] = _pkg
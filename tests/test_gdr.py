@@ -0,0 +1,77 @@
+"""Tests für den GDR-Decoder (gdr.py) mit einem festen Beispiel-Frame"""
+
+import pytest
+
+from ksem.gdr import GDR_SENSORS, GdrDecodeError, decode_gdrs
+
+UUID = b"0b6bef8f-c578-4ab3-9ce2-a05418f7fca3"
+
+# GDRs-Frame von Hand nach dem Beispiel in api.md aufgebaut (Wallbox-UUID,
+# status 1, timestamp 1752254953, 229 V an L1, 16 A an L1, leerer
+# evse_error_code). Zusätzlich ein uint64-OBIS-Schlüssel mit float-Wert und
+# ein unbekanntes Feld 15. Kann durch einen Frame aus einem Mitschnitt
+# (Option capture_traffic, Feld "b64") ersetzt werden.
+GDR = (
+    bytes.fromhex("0a 24") + UUID  # 1 id (LEN 36)
+    + bytes.fromhex("10 01")  # 2 status = 1
+    + bytes.fromhex("1a 06 08 e9 93 c5 c3 06")  # 3 Timestamp{seconds = 1752254953}
+    # 4 values: "1-0:32.4.0*255" -> double 229.0
+    + bytes.fromhex("22 19 0a 0e") + b"1-0:32.4.0*255"
+    + bytes.fromhex("11 00 00 00 00 00 a0 6c 40")
+    # 4 values: "1-0:31.7.0*255" -> double 16.0
+    + bytes.fromhex("22 19 0a 0e") + b"1-0:31.7.0*255"
+    + bytes.fromhex("11 00 00 00 00 00 00 30 40")
+    # 4 values: uint64 01 00 33 07 00 ff (1-0:51.7.0*255) -> float 15.5
+    + bytes.fromhex("22 0c 08 ff 81 9c 98 83 20 15 00 00 78 41")
+    # 5 flexValues: "evse_error_code" -> leere Untermeldung
+    + bytes.fromhex("2a 13 0a 0f") + b"evse_error_code" + bytes.fromhex("12 00")
+    + bytes.fromhex("78 2a")  # 15 unbekannt, varint 42
+)
+FRAME = (
+    bytes.fromhex("0a b4 01")  # 1 GDRs-Eintrag (LEN 180)
+    + bytes.fromhex("0a 24") + UUID  # Schlüssel
+    + bytes.fromhex("12 8b 01")  # Wert: GDR (LEN 139)
+    + GDR
+)
+
+
+def test_decode_example_frame():
+    assert len(GDR) == 139
+    assert len(FRAME) == 183
+    assert decode_gdrs(FRAME) == {
+        UUID.decode(): {
+            "id": UUID.decode(),
+            "status": 1,
+            "timestamp": 1752254953,
+            "values": {
+                "1-0:32.4.0*255": 229.0,
+                "1-0:31.7.0*255": 16.0,
+                "1-0:51.7.0*255": 15.5,
+            },
+            "flexValues": {"evse_error_code": {}},
+        }
+    }
+
+
+def test_phase_currents_are_sensors():
+    values = decode_gdrs(FRAME)[UUID.decode()]["values"]
+    for obis in ("1-0:31.7.0*255", "1-0:51.7.0*255", "1-0:32.4.0*255"):
+        assert obis in values
+        assert obis in GDR_SENSORS
+    assert GDR_SENSORS["1-0:31.7.0*255"][1:3] == ("A", 1)
+
+
+def test_unknown_top_level_field_skipped():
+    assert decode_gdrs(bytes.fromhex("10 05") + FRAME) == decode_gdrs(FRAME)
+
+
+@pytest.mark.parametrize(
+    "frame, message",
+    [
+        (FRAME[:-5], "länger als der Frame"),
+        (FRAME[:2], "Varint über Frame-Ende"),
+    ],
+)
+def test_truncated_frame(frame, message):
+    with pytest.raises(GdrDecodeError, match=message):
+        decode_gdrs(frame)
@@ -0,0 +1,54 @@
+"""Tests für den Circuit Breaker (health.py)"""
+
+import asyncio
+
+from ksem.health import (
+    STATE_CLOSED,
+    STATE_OPEN,
+    TRANSPORT_HTTP,
+    TRANSPORT_MODBUS,
+    HostHealth,
+)
+
+REFUSED = ConnectionRefusedError("Connection refused")
+
+
+def _run(scenario):
+    async def run():
+        health = HostHealth("192.0.2.1", failure_threshold=3)
+        try:
+            scenario(health)
+            return health.state
+        finally:
+            health.shutdown()
+
+    return asyncio.run(run())
+
+
+def test_modbus_failures_alone_keep_circuit_closed():
+    def scenario(health):
+        health.record_success(TRANSPORT_HTTP)
+        for _ in range(10):
+            health.record_failure(REFUSED, TRANSPORT_MODBUS)
+
+    assert _run(scenario) == STATE_CLOSED
+
+
+def test_opens_when_all_transports_fail():
+    def scenario(health):
+        health.record_success(TRANSPORT_HTTP)
+        for _ in range(3):
+            health.record_failure(REFUSED, TRANSPORT_MODBUS)
+        health.record_failure(REFUSED, TRANSPORT_HTTP)
+
+    assert _run(scenario) == STATE_OPEN
+
+
+def test_single_transport_opens_at_threshold():
+    def scenario(health):
+        for _ in range(2):
+            health.record_failure(REFUSED)
+        assert health.state == STATE_CLOSED
+        health.record_failure(REFUSED)
+
+    assert _run(scenario) == STATE_OPEN
@@ -0,0 +1,204 @@
+"""Tests für KsemModbusClient (Pipelining-Fehler) und detect_read_adapter"""
+
+import asyncio
+
+import pytest
+
+from ksem.modbus_helper import KsemModbusClient, detect_read_adapter
+from ksem.modbus_pipeline import PipelineRejected
+
+
+class FakePipeline:
+    """Steht für ModbusTcpPipeline: read_blocks wirft den vorgegebenen Fehler"""
+
+    def __init__(self, error):
+        self.error = error
+        self.connected = True
+
+    async def read_blocks(self, blocks):
+        if self.error is None:
+            return []
+        raise self.error
+
+    async def close(self):
+        self.connected = False
+
+
+class FakeHealth:
+    def __init__(self):
+        self.failures = []
+
+    def check(self):
+        pass
+
+    def record_failure(self, err, transport):
+        self.failures.append((transport, err))
+
+    def record_success(self, transport):
+        pass
+
+
+def _client(error):
+    client = KsemModbusClient("192.0.2.1", pipelining=True, health=FakeHealth())
+    client._pipeline = FakePipeline(error)
+    return client
+
+
+@pytest.mark.parametrize(
+    "error", [ConnectionError("reset"), OSError("unreachable"), asyncio.TimeoutError()]
+)
+def test_pipelining_transport_error_keeps_pipelining(error):
+    client = _client(error)
+    with pytest.raises(ConnectionError, match="Modbus-Transportfehler"):
+        asyncio.run(client.read_all())
+    assert client.pipelining is True
+    assert client._pipeline is None
+    assert client.health.failures == [("modbus", error)]
+    assert client.connection_stats["transport_errors"] == 1
+    assert client.connection_stats["next_attempt_in"] > 0
+
+
+def test_pipelining_rejected_falls_back_to_serial():
+    client = _client(PipelineRejected("Unerwartete Transaction-ID 7"))
+    responses = asyncio.run(client._read_pipelined([]))
+    assert responses is None
+    assert client.pipelining is False
+    assert client._pipeline is None
+    assert client.health.failures == []
+
+
+def test_pipelining_repeated_timeouts_fall_back_to_serial():
+    client = _client(asyncio.TimeoutError())
+    for attempt in range(1, 4):
+        client._pipeline = FakePipeline(asyncio.TimeoutError("Keine Antwort"))
+        with pytest.raises(ConnectionError):
+            asyncio.run(client._read_pipelined([]))
+        assert client.pipelining is (attempt < 3)
+    assert len(client.health.failures) == 3
+
+
+def test_pipelining_success_resets_timeouts():
+    client = _client(asyncio.TimeoutError())
+    for error in (asyncio.TimeoutError(), asyncio.TimeoutError(), None):
+        client._pipeline = FakePipeline(error)
+        if error is None:
+            assert asyncio.run(client._read_pipelined([])) == []
+        else:
+            with pytest.raises(ConnectionError):
+                asyncio.run(client._read_pipelined([]))
+    assert client._pipeline_timeouts == 0
+    assert client.pipelining is True
+
+
+class Recorder:
+    """Zeichnet die Keyword-Argumente jedes Aufrufs auf"""
+
+    def __init__(self):
+        self.calls = []
+
+    def record(self, **kwargs):
+        self.calls.append(kwargs)
+        return kwargs
+
+
+def _pymodbus_2x(recorder):
+    def read_holding_registers(address, count=1, **kwargs):
+        return recorder.record(address=address, count=count, **kwargs)
+
+    return read_holding_registers
+
+
+def _pymodbus_3_0(recorder):
+    def read_holding_registers(address, count=1, slave=0, **kwargs):
+        return recorder.record(address=address, count=count, slave=slave, **kwargs)
+
+    return read_holding_registers
+
+
+def _pymodbus_3_9(recorder):
+    def read_holding_registers(address, count=1, slave=1, no_response_expected=False):
+        return recorder.record(address=address, count=count, slave=slave)
+
+    return read_holding_registers
+
+
+def _pymodbus_3_10(recorder):
+    def read_holding_registers(
+        address, *, count=1, device_id=1, no_response_expected=False
+    ):
+        return recorder.record(address=address, count=count, device_id=device_id)
+
+    return read_holding_registers
+
+
+def _opaque(error):
+    def factory(recorder):
+        class Opaque:
+            """Aufrufbar, aber ohne lesbare Signatur"""
+
+            @property
+            def __signature__(self):
+                raise error("keine Signatur")
+
+            def __call__(self, **kwargs):
+                return recorder.record(**kwargs)
+
+        return Opaque()
+
+    return factory
+
+
+@pytest.mark.parametrize(
+    "factory, keyword",
+    [
+        (_pymodbus_2x, "unit"),
+        (_pymodbus_3_0, "slave"),
+        (_pymodbus_3_9, "slave"),
+        (_pymodbus_3_10, "device_id"),
+        (_opaque(TypeError), "slave"),
+        (_opaque(ValueError), "slave"),
+    ],
+)
+def test_detect_read_adapter(factory, keyword):
+    recorder = Recorder()
+    name, read = detect_read_adapter(factory(recorder), 7)
+    assert name == keyword
+    read(address=0x10, count=4)
+    assert recorder.calls == [{"address": 0x10, "count": 4, keyword: 7}]
+
+
+def test_read_due_keeps_tiers_due_after_failure():
+    client = KsemModbusClient("192.0.2.1")
+    requested = []
+
+    async def read_blocks(blocks):
+        requested.append(len(blocks))
+        if len(requested) == 1:
+            raise ConnectionError("Modbus-Transportfehler: reset")
+        return {}
+
+    client._read_blocks = read_blocks
+    every_block = len(client.plan.blocks)
+    with pytest.raises(ConnectionError):
+        asyncio.run(client.read_due(now=100))
+    assert client._next_due == {}
+    # Nach dem Fehler sind weiterhin alle Klassen fällig
+    asyncio.run(client.read_due(now=101))
+    assert requested == [every_block, every_block]
+    assert client._next_due == {"fast": 102, "normal": 111, "slow": 161}
+
+
+def test_wallbox_registers_not_polled_by_default():
+    client = KsemModbusClient("192.0.2.1")
+    slots = {field.slot for block in client.plan for field in block.fields}
+    assert "Active Power+" in slots
+    assert not slots & {
+        "Enector_status",
+        "Enector_L1",
+        "Enector_Ladeleistung",
+        "Enector_geladene_Energie",
+    }
+    client.set_enabled_addresses(set())
+    client.enable_address(49246)
+    slots = {field.slot for block in client.plan for field in block.fields}
+    assert slots == {"Enector_Ladeleistung"}
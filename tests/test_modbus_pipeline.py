@@ -0,0 +1,89 @@
+"""Tests für ModbusTcpPipeline gegen einen lokalen Modbus-TCP-Server"""
+
+import asyncio
+import struct
+
+import pytest
+
+from ksem.modbus_pipeline import ModbusTcpPipeline, PipelineRejected
+from ksem.modbus_plan import PlanBlock
+
+REQUEST = struct.Struct(">HHHBBHH")
+
+
+def _response(tid, count, fc=0x03):
+    pdu = bytes([fc, count * 2]) + struct.pack(f">{count}H", *range(count))
+    return struct.pack(">HHHB", tid, 0, len(pdu) + 1, 1) + pdu
+
+
+async def _serve(delays, fc=0x03):
+    """Server, der Request n nach delays[n] Sekunden beantwortet (None = nie)"""
+    requests = []
+
+    async def handle(reader, writer):
+        while True:
+            try:
+                raw = await reader.readexactly(REQUEST.size)
+            except asyncio.IncompleteReadError:
+                return
+            tid, _, _, _, _, _, count = REQUEST.unpack(raw)
+            delay = delays[len(requests)]
+            requests.append(tid)
+            if delay is None:
+                continue
+
+            async def answer(tid=tid, count=count, delay=delay):
+                await asyncio.sleep(delay)
+                writer.write(_response(tid, count, fc))
+
+            asyncio.create_task(answer())
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, server.sockets[0].getsockname()[1], requests
+
+
+def _read(delays, blocks, fc=0x03):
+    async def run():
+        server, port, _ = await _serve(delays, fc)
+        pipeline = ModbusTcpPipeline("127.0.0.1", port, timeout=0.2)
+        try:
+            return await pipeline.read_blocks(blocks)
+        finally:
+            await pipeline.close()
+            server.close()
+
+    return asyncio.run(run())
+
+
+BLOCKS = [PlanBlock(0, 2, ()), PlanBlock(10, 3, ())]
+
+
+def test_reads_blocks_out_of_order():
+    assert _read([0.05, 0], BLOCKS) == [[0, 1], [0, 1, 2]]
+
+
+def test_lost_answer_is_a_timeout():
+    with pytest.raises(asyncio.TimeoutError):
+        _read([None, 0], BLOCKS)
+
+
+def test_late_answer_is_not_a_rejection():
+    async def run():
+        # Antwort auf Request 1 kommt nach dessen Timeout, während Request 2 läuft
+        server, port, _ = await _serve([0.3, 0.15])
+        pipeline = ModbusTcpPipeline("127.0.0.1", port, timeout=0.2)
+        await pipeline.connect()
+        try:
+            with pytest.raises(asyncio.TimeoutError):
+                await pipeline.read_holding_registers(0, 2)
+            return await pipeline.read_holding_registers(10, 3)
+        finally:
+            await pipeline.close()
+            server.close()
+
+    assert asyncio.run(run()) == [0, 1, 2]
+
+
+def test_mismatched_answer_is_rejected():
+    with pytest.raises(PipelineRejected):
+        _read([0, 0], BLOCKS, fc=0x04)